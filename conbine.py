@@ -1,8 +1,45 @@
+import concurrent.futures
+import logging
 import os
+import re
+import netCDF4
 import numpy as np
 import xarray as xr
+from collections import defaultdict
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+from logging_config import setup_era5_logging
+
+# h5netcdf直接走h5py，逐变量的Python封装开销比netCDF4小，
+# 多变量数据集写出更快；未安装时退回netCDF4，功能完全一致
+try:
+    import h5netcdf  # noqa: F401
+    _NC_ENGINE = "h5netcdf"
+except ImportError:
+    _NC_ENGINE = "netcdf4"
+
+# 主进程在merge_data里通过setup_era5_logging配置处理器；
+# 工作进程fork后继承的处理器队列没有监听线程，默认INFO级别下
+# 这里的debug调用会被直接过滤掉，几乎零开销
+logger = logging.getLogger("ERA5Project")
+
+
+def _list_nc_files(directory):
+    """列出目录下的nc文件，按文件名中的日期时间排序
+
+    os.scandir比Path.glob少一层模式匹配和对象封装，万级文件的目录上
+    快数倍；排序键用提取出的短日期时间串而不是完整路径字符串，
+    比较成本更低且显式按时间序排列。
+    """
+    try:
+        files = [Path(entry.path) for entry in os.scandir(directory)
+                 if entry.name.endswith('.nc')]
+    except FileNotFoundError:
+        # 与Path.glob一致：目录不存在时返回空列表而不是抛异常
+        return []
+    files.sort(key=extract_datetime_from_filename)
+    return files
 
 
 def check_data_info(pl_path, sl_path, tp_path):
@@ -10,11 +47,11 @@ def check_data_info(pl_path, sl_path, tp_path):
     pl_dir = Path(pl_path)
     sl_dir = Path(sl_path)
     tp_dir = Path(tp_path)
-    
+
     # 获取文件列表
-    pl_files = sorted(pl_dir.glob("*.nc"))
-    sl_files = sorted(sl_dir.glob("*.nc"))
-    tp_files = sorted(tp_dir.glob("*.nc"))
+    pl_files = _list_nc_files(pl_dir)
+    sl_files = _list_nc_files(sl_dir)
+    tp_files = _list_nc_files(tp_dir)
     
     print(f"压力层文件数量: {len(pl_files)}")
     print(f"地表层文件数量: {len(sl_files)}")
@@ -53,54 +90,46 @@ def check_data_info(pl_path, sl_path, tp_path):
     return pl_files, sl_files, tp_files
 
 
+# 日期时间模式 YYYYMMDD_HHMM，预编译成C层正则，
+# 替代逐token的len/isdigit Python循环（每个文件都要调用一次）
+_DT_RE = re.compile(r'(\d{8})_(\d{4})')
+
+
 def extract_datetime_from_filename(filename):
     """从文件名中提取日期时间信息"""
     # 移除文件扩展名
     name = filename.stem
-    
+
     # 如果文件名包含日期时间格式，提取它
     # 例如：era5_20180101_0000_pl.nc -> 20180101_0000
-    parts = name.split('_')
-    
-    # 查找日期和时间部分
-    date_part = None
-    time_part = None
-    
-    for part in parts:
-        # 查找8位数字的日期 (YYYYMMDD)
-        if len(part) == 8 and part.isdigit():
-            date_part = part
-        # 查找4位数字的时间 (HHMM)
-        elif len(part) == 4 and part.isdigit():
-            time_part = part
-    
-    if date_part and time_part:
-        return f"{date_part}_{time_part}"
-    else:
-        # 如果找不到标准格式，返回去掉类型后缀的文件名
-        # 移除最后的 _pl, _sl, _tp 等后缀
-        if name.endswith('_pl') or name.endswith('_sl') or name.endswith('_tp'):
-            return '_'.join(parts[:-1])
-        return name
+    m = _DT_RE.search(name)
+    if m:
+        return f"{m.group(1)}_{m.group(2)}"
+
+    # 如果找不到标准格式，返回去掉类型后缀的文件名
+    # 移除最后的 _pl, _sl, _tp 等后缀
+    if name.endswith(('_pl', '_sl', '_tp')):
+        return name.rsplit('_', 1)[0]
+    return name
 
 
 def parse_datetime_string(datetime_str):
     """将日期时间字符串解析为datetime对象"""
     try:
-        # 格式: YYYYMMDD_HHMM
-        return datetime.strptime(datetime_str, "%Y%m%d_%H%M")
-    except ValueError:
-        try:
-            # 格式: YYYYMMDD_HH00 (如果分钟是00)
-            return datetime.strptime(datetime_str, "%Y%m%d_%H00")
-        except ValueError:
-            # 如果解析失败，返回None
-            return None
+        # 格式: YYYYMMDD_HHMM（唯一使用的格式）。直接切片取整数构造，
+        # 比strptime的格式解析快数倍，这个函数在每个文件上都要调用
+        return datetime(int(datetime_str[0:4]), int(datetime_str[4:6]),
+                        int(datetime_str[6:8]), int(datetime_str[9:11]),
+                        int(datetime_str[11:13]))
+    except (ValueError, IndexError):
+        # 如果解析失败，返回None
+        return None
 
 
-def merge_data(pl_path, sl_path, tp_path, output_path, start_time=None, end_time=None):
+def merge_data(pl_path, sl_path, tp_path, output_path, start_time=None, end_time=None,
+               single_output=False, verify=False):
     """合并三个文件夹中的数据并保存到输出目录
-    
+
     Args:
         pl_path: 压力层文件路径
         sl_path: 地表层文件路径
@@ -108,20 +137,23 @@ def merge_data(pl_path, sl_path, tp_path, output_path, start_time=None, end_time
         output_path: 输出路径
         start_time: 开始时间 (格式: "YYYY-MM-DD HH:MM" 或 "YYYYMMDD_HHMM")
         end_time: 结束时间 (格式: "YYYY-MM-DD HH:MM" 或 "YYYYMMDD_HHMM")
+        single_output: True时所有时次追加写入单个带时间维的文件，
+            而不是每个时次一个文件
+        verify: True时每个输出文件写完后回读元数据做校验
+            （每个时次多一次文件打开，默认关闭）
     """
+    # 统一走项目的日志配置：文件+控制台输出由后台线程批量落盘，
+    # 每时次的细节消息降为debug，默认INFO级别下不再逐行刷屏
+    setup_era5_logging(log_prefix="merge")
+
     pl_dir = Path(pl_path)
     sl_dir = Path(sl_path)
     tp_dir = Path(tp_path)
     output_dir = Path(output_path)
-    
+
     # 确保输出目录存在
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 获取文件列表
-    pl_files = sorted(pl_dir.glob("*.nc"))
-    sl_files = sorted(sl_dir.glob("*.nc"))
-    tp_files = sorted(tp_dir.glob("*.nc"))
-    
+
     # 解析起止时间
     start_dt = None
     end_dt = None
@@ -136,7 +168,7 @@ def merge_data(pl_path, sl_path, tp_path, output_path, start_time=None, end_time
                 # 格式: "YYYYMMDD_HHMM"
                 start_dt = datetime.strptime(start_time, "%Y%m%d_%H%M")
             except ValueError:
-                print(f"无法解析开始时间: {start_time}")
+                logger.error("无法解析开始时间: %s", start_time)
                 return
     
     if end_time:
@@ -148,192 +180,350 @@ def merge_data(pl_path, sl_path, tp_path, output_path, start_time=None, end_time
                 # 格式: "YYYYMMDD_HHMM"
                 end_dt = datetime.strptime(end_time, "%Y%m%d_%H%M")
             except ValueError:
-                print(f"无法解析结束时间: {end_time}")
+                logger.error("无法解析结束时间: %s", end_time)
                 return
     
-    # 按日期时间分组
-    date_groups = {}
-    
-    print("\n=== 文件名分析 ===")
-    
-    # 处理所有文件并过滤时间范围
-    all_files = []
-    
-    # 处理pl文件
-    print("PL文件:")
-    for file in pl_files:
-        datetime_str = extract_datetime_from_filename(file)
-        file_dt = parse_datetime_string(datetime_str)
-        if file_dt:
-            # 检查是否在时间范围内
-            if start_dt and file_dt < start_dt:
-                continue
-            if end_dt and file_dt > end_dt:
-                continue
-            all_files.append(('pl', file, datetime_str, file_dt))
-            print(f"  {file.name} -> {datetime_str}")
-    
-    # 处理sl文件
-    print("SL文件:")
-    for file in sl_files:
-        datetime_str = extract_datetime_from_filename(file)
-        file_dt = parse_datetime_string(datetime_str)
-        if file_dt:
-            # 检查是否在时间范围内
-            if start_dt and file_dt < start_dt:
-                continue
-            if end_dt and file_dt > end_dt:
-                continue
-            all_files.append(('sl', file, datetime_str, file_dt))
-            print(f"  {file.name} -> {datetime_str}")
-    
-    # 处理tp文件
-    print("TP文件:")
-    for file in tp_files:
-        datetime_str = extract_datetime_from_filename(file)
-        file_dt = parse_datetime_string(datetime_str)
-        if file_dt:
-            # 检查是否在时间范围内
-            if start_dt and file_dt < start_dt:
-                continue
-            if end_dt and file_dt > end_dt:
-                continue
-            all_files.append(('tp', file, datetime_str, file_dt))
-            print(f"  {file.name} -> {datetime_str}")
-    
-    # 按日期时间分组
-    for file_type, file, datetime_str, file_dt in all_files:
-        if datetime_str not in date_groups:
-            date_groups[datetime_str] = {'pl': None, 'sl': None, 'tp': None}
-        date_groups[datetime_str][file_type] = file
-    
-    print(f"找到 {len(date_groups)} 个日期时间组 (在指定时间范围内)")
+    # 一次遍历完成目录枚举、日期提取、时间过滤和分组：
+    # 不再先为三个目录各建一份排序文件列表再二次循环，
+    # 每个文件只经过一次Python层处理；分组用dict，排序留给需要的消费方
+    date_groups = defaultdict(lambda: {'pl': None, 'sl': None, 'tp': None})
+    counts = {'pl': 0, 'sl': 0, 'tp': 0}
+
+    for file_type, type_dir in (('pl', pl_dir), ('sl', sl_dir), ('tp', tp_dir)):
+        try:
+            entries = os.scandir(type_dir)
+        except FileNotFoundError:
+            # 目录不存在时按空目录处理，与旧的glob行为一致
+            continue
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith('.nc'):
+                    continue
+                file = Path(entry.path)
+                datetime_str = extract_datetime_from_filename(file)
+                file_dt = parse_datetime_string(datetime_str)
+                if not file_dt:
+                    continue
+                # 检查是否在时间范围内
+                if start_dt and file_dt < start_dt:
+                    continue
+                if end_dt and file_dt > end_dt:
+                    continue
+                date_groups[datetime_str][file_type] = file
+                counts[file_type] += 1
+
+    logger.info("=== 文件名分析 ===")
+    logger.info("PL文件: %d 个, SL文件: %d 个, TP文件: %d 个",
+                counts['pl'], counts['sl'], counts['tp'])
+    logger.info("找到 %d 个日期时间组 (在指定时间范围内)", len(date_groups))
     
     # 显示时间范围信息
     if start_dt or end_dt:
-        print(f"时间范围: {start_dt} 到 {end_dt}")
+        logger.info("时间范围: %s 到 %s", start_dt, end_dt)
     
-    processed_count = 0
-    
-    # 处理每个日期时间组
+    # 定义标准气压层（hPa）
+    pressure_levels = [50, 100, 150, 200, 250, 300, 400, 500, 600, 700, 850, 925, 1000]
+
+    # 过滤掉不完整的组
+    complete_groups = []
     for datetime_str, files in date_groups.items():
         if files['pl'] is None or files['sl'] is None or files['tp'] is None:
-            print(f"跳过 {datetime_str}：缺少pl、sl或tp文件")
+            logger.warning("跳过 %s：缺少pl、sl或tp文件", datetime_str)
             continue
-        
-        print(f"处理 {datetime_str}...")
-        
-        try:
-            all_data = []
-            var_names = []  # 保存变量名
-            
-            # 定义标准气压层（hPa）
-            pressure_levels = [50, 100, 150, 200, 250, 300, 400, 500, 600, 700, 850, 925, 1000]
-            
-            # 处理压力层文件
-            ds_pl = xr.open_dataset(files['pl'])
-            pl_vars = list(ds_pl.data_vars.keys())
-            print(f"  PL变量: {pl_vars}")
-            
-            for var in pl_vars:
-                data = ds_pl[var].values
-                # 去掉时间维度
-                if data.ndim == 4:  # (time, level, lat, lon)
-                    data = data.squeeze(0)  # (level, lat, lon)
-                    # 为每个压力层添加变量名
-                    for level_idx in range(data.shape[0]):
-                        all_data.append(data[level_idx])  # (lat, lon)
-                        pressure = pressure_levels[level_idx]
-                        var_names.append(f"{var}{pressure}")
-            
-            # 处理地表层文件
-            ds_sl = xr.open_dataset(files['sl'])
-            sl_vars = list(ds_sl.data_vars.keys())
-            print(f"  SL变量: {sl_vars}")
-            
-            for var in sl_vars:
-                data = ds_sl[var].values
-                # 去掉时间维度
-                if data.ndim == 3:  # (time, lat, lon)
-                    data = data.squeeze(0)  # (lat, lon)
-                all_data.append(data)
-                var_names.append(var)
-            
-            # 处理降水文件
-            ds_tp = xr.open_dataset(files['tp'])
-            tp_vars = list(ds_tp.data_vars.keys())
-            print(f"  TP变量: {tp_vars}")
-            
-            for var in tp_vars:
-                data = ds_tp[var].values
-                # 去掉时间维度
-                if data.ndim == 3:  # (time, lat, lon)
-                    data = data.squeeze(0)  # (lat, lon)
-                all_data.append(data)
-                var_names.append(var)
-            
-            # 堆叠所有数据为3D数组
-            merged = np.stack(all_data, axis=0)  # (levels, lat, lon)
-            actual_levels = merged.shape[0]
-            print(f"  合并后形状: {merged.shape}")
-            print(f"  变量总数: {len(var_names)}")
-            print(f"  变量名示例: {var_names[:10]}...")
-            
-            # 创建包含所有变量的数据集
-            data_vars = {}
+        complete_groups.append((datetime_str, files))
+
+    processed_count = 0
+
+    # 坐标数组和变量清单在所有时次间完全相同，只从第一组探测一次，
+    # 避免每个时次重复做同样的元数据读取
+    group_meta = _probe_group_meta(complete_groups[0][1]) if complete_groups else None
+
+    # 用第一个pl文件里的实际气压层校验默认配置：不一致时（部分下载、
+    # 不同层集）提前改用文件里的层，而不是在循环深处因IndexError中断
+    if group_meta and group_meta['levels'] is not None \
+            and group_meta['levels'] != pressure_levels:
+        logger.warning("pl文件的气压层与默认配置不一致，改用文件中的 %d 层: %s",
+                       len(group_meta['levels']), group_meta['levels'])
+        pressure_levels = group_meta['levels']
+
+    if single_output:
+        # 单文件模式：按时间顺序追加写入一个带无限时间维的文件，
+        # 每个时间步是一次小的增量写，无需把所有时次同时载入内存
+        complete_groups.sort(key=lambda item: item[0])
+        processed_count = _merge_to_single_file(complete_groups, output_dir,
+                                                pressure_levels, group_meta)
+        logger.info("合并完成！成功处理 %d 个时次", processed_count)
+        return
+
+    # 各日期时间组完全独立（各自读三个文件、写一个文件），用进程池并行处理；
+    # 工作进程内部自行打开数据集，进程间只传路径，不传xarray对象
+    with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(_process_group, datetime_str, files,
+                                   output_dir, pressure_levels, group_meta,
+                                   verify): datetime_str
+                   for datetime_str, files in complete_groups}
+        for future in concurrent.futures.as_completed(futures):
+            datetime_str = futures[future]
+            try:
+                if future.result():
+                    processed_count += 1
+            except Exception as e:
+                logger.error("处理 %s 时出错: %s", datetime_str, e)
+
+    logger.info("合并完成！成功处理 %d 个文件", processed_count)
+
+
+def _grid_var_names(ds):
+    """返回带经纬度网格的数据变量名（跳过坐标和标量变量）"""
+    return [name for name, var in ds.variables.items()
+            if name not in ds.dimensions
+            and 'latitude' in var.dimensions and 'longitude' in var.dimensions]
+
+
+def _read_var(ds, name):
+    """整块读取一个变量并转为float32 ndarray
+
+    ERA5原始short+scale解码默认得到float64，降到float32使
+    内存占用和写盘字节数减半，且不低于源数据的有效精度；
+    copy=False让本来就是float32的数组零开销通过。
+    """
+    var = ds.variables[name]
+    try:
+        # 放大HDF5的每变量chunk缓存：压缩变量整块读取时减少缓存换入换出
+        var.set_var_chunk_cache(size=64 * 1024 * 1024)
+    except (AttributeError, RuntimeError):
+        # NETCDF3等不支持chunk缓存的格式直接跳过
+        pass
+    data = var[...]
+    if np.ma.isMaskedArray(data):
+        # 仅当调用方未关闭auto_mask时会走到这里（外部来源的文件兜底）
+        data = data.filled(np.nan)
+    return data.astype(np.float32, copy=False)
+
+
+def _probe_group_meta(files):
+    """从一组文件探测经纬度坐标和各类变量名（所有时次共用，只需读一次）"""
+    meta = {}
+    with netCDF4.Dataset(files['pl'], 'r') as ds:
+        meta['pl_vars'] = _grid_var_names(ds)
+        meta['latitude'] = np.asarray(ds.variables['latitude'][...])
+        meta['longitude'] = np.asarray(ds.variables['longitude'][...])
+        # 气压层坐标（不同来源的文件坐标名不尽相同，找不到时为None）
+        meta['levels'] = None
+        for name in ('level', 'pressure_level', 'isobaricInhPa', 'plev'):
+            if name in ds.variables:
+                meta['levels'] = [int(v) for v in np.asarray(ds.variables[name][...])]
+                break
+    with netCDF4.Dataset(files['sl'], 'r') as ds:
+        meta['sl_vars'] = _grid_var_names(ds)
+    with netCDF4.Dataset(files['tp'], 'r') as ds:
+        meta['tp_vars'] = _grid_var_names(ds)
+    return meta
+
+
+def _load_group(files, pressure_levels, meta=None):
+    """读取一组pl/sl/tp文件的全部2D变量数组
+
+    返回 (arrays, pl_vars, sl_vars, tp_vars, coords)，其中arrays按输出顺序
+    映射 变量名 -> (lat, lon) float32数组。这里只需要原始变量数组和一份
+    经纬度坐标，直接用netCDF4读取，跳过xarray逐文件的坐标解码和对齐开销。
+    """
+    # 直接把各文件中已连续的数组切片挂进arrays：
+    # 先收集到列表再np.stack会额外分配并复制一整份数据，峰值内存翻倍
+    arrays = {}
+
+    # 处理压力层文件
+    with netCDF4.Dataset(files['pl'], 'r') as ds_pl:
+        # 关闭auto_mask省掉整块数据的掩码数组封装和拷贝；拆分流水线写出的
+        # 文件没有填充值，掩码检查纯属开销。auto_scale保持开启以解码short打包
+        ds_pl.set_auto_mask(False)
+        ds_pl.set_auto_scale(True)
+        pl_vars = meta['pl_vars'] if meta else _grid_var_names(ds_pl)
+
+        for var in pl_vars:
+            data = _read_var(ds_pl, var)
+            # 去掉时间维度
+            if data.ndim == 4:  # (time, level, lat, lon)
+                data = data.squeeze(0)  # (level, lat, lon)
+            if data.ndim == 3:  # (level, lat, lon)
+                # 层数不符（如部分下载的文件）时立刻报错，
+                # 而不是在pressure_levels[level_idx]处抛出难懂的IndexError
+                if data.shape[0] != len(pressure_levels):
+                    raise ValueError(
+                        f"{files['pl']} 中 {var} 的气压层数 {data.shape[0]} "
+                        f"与预期的 {len(pressure_levels)} 层不符")
+                # 为每个压力层添加变量名，data[level_idx]是视图而非拷贝
+                for level_idx in range(data.shape[0]):
+                    arrays[f"{var}{pressure_levels[level_idx]}"] = data[level_idx]
+
+        # 经纬度坐标优先用探测到的共享数组，没有时才从pl文件读
+        if meta:
+            coords = {'latitude': meta['latitude'], 'longitude': meta['longitude']}
+        else:
             coords = {
-                'latitude': ds_pl.latitude.values,
-                'longitude': ds_pl.longitude.values
-            }
-            
-            # 为每个变量创建单独的DataArray
-            for i, var_name in enumerate(var_names):
-                data_vars[var_name] = (['latitude', 'longitude'], merged[i])
-            
-            # 创建新的xarray数据集
-            merged_ds = xr.Dataset(data_vars, coords=coords)
-            
-            # 添加属性信息
-            merged_ds.attrs = {
-                'description': 'Merged ERA5 data (pl + sl + tp)',
-                'total_variables': len(var_names),
-                'pressure_levels': ', '.join(map(str, pressure_levels)),
-                'pl_variables': ', '.join(pl_vars),
-                'sl_variables': ', '.join(sl_vars),
-                'tp_variables': ', '.join(tp_vars),
-                'variable_list': ', '.join(var_names),
-                'datetime': datetime_str
+                'latitude': np.asarray(ds_pl.variables['latitude'][...]),
+                'longitude': np.asarray(ds_pl.variables['longitude'][...])
             }
-            
-            # 保存为nc文件
-            output_file = output_dir / f"era5_{datetime_str}.nc"
-            merged_ds.to_netcdf(output_file, unlimited_dims=None)
-            
-            # 验证保存的文件
-            verify_ds = xr.open_dataset(output_file)
-            print(f"  保存到: {output_file}")
-            print(f"  验证变量数: {len(verify_ds.data_vars)}")
-            print(f"  变量名示例: {list(verify_ds.data_vars.keys())[:10]}...")
-            
-            # 检查第一个变量的形状
-            first_var = list(verify_ds.data_vars.keys())[0]
-            var_shape = verify_ds[first_var].shape
-            print(f"  单个变量形状: {var_shape}")
-            
-            verify_ds.close()
-            
-            # 关闭数据集
-            ds_pl.close()
-            ds_sl.close()
-            ds_tp.close()
-            merged_ds.close()
-            
+
+    # 处理地表层文件
+    with netCDF4.Dataset(files['sl'], 'r') as ds_sl:
+        ds_sl.set_auto_mask(False)
+        ds_sl.set_auto_scale(True)
+        sl_vars = meta['sl_vars'] if meta else _grid_var_names(ds_sl)
+
+        for var in sl_vars:
+            data = _read_var(ds_sl, var)
+            # 去掉时间维度
+            if data.ndim == 3:  # (time, lat, lon)
+                data = data.squeeze(0)  # (lat, lon)
+            arrays[var] = data
+
+    # 处理降水文件
+    with netCDF4.Dataset(files['tp'], 'r') as ds_tp:
+        ds_tp.set_auto_mask(False)
+        ds_tp.set_auto_scale(True)
+        tp_vars = meta['tp_vars'] if meta else _grid_var_names(ds_tp)
+
+        for var in tp_vars:
+            data = _read_var(ds_tp, var)
+            # 去掉时间维度
+            if data.ndim == 3:  # (time, lat, lon)
+                data = data.squeeze(0)  # (lat, lon)
+            arrays[var] = data
+
+    return arrays, pl_vars, sl_vars, tp_vars, coords
+
+
+def _merge_to_single_file(complete_groups, output_dir, pressure_levels, meta):
+    """把所有时次追加写入单个带无限时间维的NetCDF文件
+
+    单个文件不能并行追加，这里顺序写入；每个变量按(1, lat, lon)分块，
+    与逐时间步的写入和下游按时次读取的访问模式一致。
+    """
+    if not complete_groups:
+        return 0
+
+    output_file = output_dir / "era5_merged.nc"
+    processed_count = 0
+
+    with netCDF4.Dataset(output_file, 'w', format='NETCDF4') as out:
+        out.description = 'Merged ERA5 data (pl + sl + tp)'
+        out.pressure_levels = ', '.join(map(str, pressure_levels))
+
+        # 维度和坐标变量：时间维无限，经纬度来自元数据探测
+        latitude = meta['latitude']
+        longitude = meta['longitude']
+        out.createDimension('time', None)
+        out.createDimension('latitude', len(latitude))
+        out.createDimension('longitude', len(longitude))
+
+        time_var = out.createVariable('time', 'f8', ('time',))
+        time_var.units = 'seconds since 1970-01-01 00:00:00 UTC'
+        time_var.calendar = 'standard'
+        out.createVariable('latitude', 'f4', ('latitude',))[:] = latitude
+        out.createVariable('longitude', 'f4', ('longitude',))[:] = longitude
+
+        out_vars = None
+        for datetime_str, files in complete_groups:
+            # 写入位置用成功计数而不是枚举序号：读取失败的组被跳过后，
+            # 后续时次紧跟其后写入，输出中不会留下全填充值的空洞记录
+            t_idx = processed_count
+            logger.debug("处理 %s -> 时间步 %d...", datetime_str, t_idx)
+            try:
+                arrays, pl_vars, sl_vars, tp_vars, coords = _load_group(
+                    files, pressure_levels, meta)
+            except Exception as e:
+                logger.error("处理 %s 时出错: %s", datetime_str, e)
+                continue
+
+            if out_vars is None:
+                # 首个时次确定变量集合并创建输出变量
+                out.pl_variables = ', '.join(pl_vars)
+                out.sl_variables = ', '.join(sl_vars)
+                out.tp_variables = ', '.join(tp_vars)
+                out.variable_list = ', '.join(arrays)
+                out.total_variables = len(arrays)
+                out_vars = {
+                    name: out.createVariable(
+                        name, 'f4', ('time', 'latitude', 'longitude'),
+                        zlib=True, complevel=4, shuffle=True,
+                        chunksizes=(1, len(latitude), len(longitude)))
+                    for name in arrays
+                }
+
+            # 文件名里的时间戳是UTC，显式标注后再取epoch秒，
+            # 否则naive datetime会按主机本地时区换算，整条时间轴随TZ偏移
+            time_var[t_idx] = parse_datetime_string(datetime_str) \
+                .replace(tzinfo=timezone.utc).timestamp()
+            for name, data in arrays.items():
+                out_vars[name][t_idx] = data
             processed_count += 1
-            
-        except Exception as e:
-            print(f"处理 {datetime_str} 时出错: {e}")
-    
-    print(f"\n合并完成！成功处理 {processed_count} 个文件")
+
+    logger.info("保存到: %s", output_file)
+    return processed_count
+
+
+def _process_group(datetime_str, files, output_dir, pressure_levels, meta=None,
+                   verify=False):
+    """合并单个日期时间组的pl/sl/tp文件并写出（进程池工作函数）"""
+    # 工作进程里logger没有可用的处理器（队列监听线程在主进程），
+    # debug调用在默认INFO级别下直接被过滤，相当于免费的静默
+    logger.debug("处理 %s...", datetime_str)
+
+    try:
+        arrays, pl_vars, sl_vars, tp_vars, coords = _load_group(files, pressure_levels, meta)
+        var_names = list(arrays)
+        logger.debug("  PL变量: %s, SL变量: %s, TP变量: %s", pl_vars, sl_vars, tp_vars)
+        logger.debug("  变量总数: %d, 示例: %s...", len(var_names), var_names[:10])
+
+        data_vars = {name: (['latitude', 'longitude'], arr)
+                     for name, arr in arrays.items()}
+
+        # 创建新的xarray数据集
+        merged_ds = xr.Dataset(data_vars, coords=coords)
+
+        # 添加属性信息
+        merged_ds.attrs = {
+            'description': 'Merged ERA5 data (pl + sl + tp)',
+            'total_variables': len(var_names),
+            'pressure_levels': ', '.join(map(str, pressure_levels)),
+            'pl_variables': ', '.join(pl_vars),
+            'sl_variables': ', '.join(sl_vars),
+            'tp_variables': ', '.join(tp_vars),
+            'variable_list': ', '.join(var_names),
+            'datetime': datetime_str
+        }
+
+        # 保存为nc文件：shuffle+deflate压缩（ERA5浮点数据常见4-10倍缩小），
+        # 每个变量是单个(lat, lon)面，整面作为一个chunk写出和读取都最快
+        output_file = output_dir / f"era5_{datetime_str}.nc"
+        encoding = {name: {'zlib': True, 'complevel': 4, 'shuffle': True,
+                           'chunksizes': merged_ds[name].shape, 'dtype': 'float32'}
+                    for name in merged_ds.data_vars}
+        merged_ds.to_netcdf(output_file, engine=_NC_ENGINE, encoding=encoding)
+
+        # 验证保存的文件（可选）：生产路径默认跳过，省掉每个时次一次
+        # 额外的文件打开；开启时也只用netCDF4读元数据，不走xarray的坐标解码
+        if verify:
+            with netCDF4.Dataset(output_file, 'r') as verify_ds:
+                verify_names = [name for name in verify_ds.variables
+                                if name not in verify_ds.dimensions]
+                logger.debug("  保存到: %s, 验证变量数: %d", output_file, len(verify_names))
+                logger.debug("  变量名示例: %s...", verify_names[:10])
+                logger.debug("  单个变量形状: %s",
+                             verify_ds.variables[verify_names[0]].shape)
+        else:
+            logger.debug("  保存到: %s", output_file)
+
+        # 关闭数据集（源文件已在_load_group内关闭）
+        merged_ds.close()
+
+        return True
+
+    except Exception as e:
+        # 错误必须跨进程可见：工作进程里用print直达继承的stdout
+        print(f"处理 {datetime_str} 时出错: {e}")
+        return False
 
 
 def main():
@@ -346,7 +536,11 @@ def main():
     parser.add_argument('--output-path', default='data', help='输出路径')
     parser.add_argument('--start-time', help='开始时间 (格式: "YYYY-MM-DD HH:MM" 或 "YYYYMMDD_HHMM")')
     parser.add_argument('--end-time', help='结束时间 (格式: "YYYY-MM-DD HH:MM" 或 "YYYYMMDD_HHMM")')
-    
+    parser.add_argument('--single-output', action='store_true',
+                        help='所有时次写入单个带时间维的文件，而不是每个时次一个文件')
+    parser.add_argument('--verify', action='store_true',
+                        help='每个输出文件写完后回读元数据做校验（较慢）')
+
     args = parser.parse_args()
     
     # 先查看数据信息
@@ -355,8 +549,9 @@ def main():
     
     # 合并数据并保存到输出目录
     print("\n=== 合并数据 ===")
-    merge_data(args.pl_path, args.sl_path, args.tp_path, args.output_path, 
-               args.start_time, args.end_time)
+    merge_data(args.pl_path, args.sl_path, args.tp_path, args.output_path,
+               args.start_time, args.end_time, single_output=args.single_output,
+               verify=args.verify)
 
 
 if __name__ == "__main__":
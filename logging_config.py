@@ -5,8 +5,11 @@ ERA5项目日志配置模块
 提供统一的日志配置功能，支持文件和控制台输出
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
@@ -20,7 +23,14 @@ class LoggingManager:
         self.log_level = log_level
         self.logger = None
         self.log_file = None
-        
+        self._listener = None
+
+    def _stop_listener(self):
+        """停止后台日志监听线程（重复调用安全）"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
     def setup_logging(self, log_prefix=None):
         """设置日志配置
         
@@ -68,10 +78,19 @@ class LoggingManager:
         console_handler.setLevel(self.log_level)
         console_handler.setFormatter(simple_formatter)
         
-        # 添加处理器
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
+        # 真正的文件/控制台处理器挂在后台QueueListener线程上，
+        # 调用线程只做入队，逐条格式化和flush不再阻塞工作代码
+        self._stop_listener()
+        log_queue = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(self.log_level)
+        self.logger.addHandler(queue_handler)
+
+        self._listener = QueueListener(log_queue, file_handler, console_handler,
+                                       respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self._stop_listener)
+
         self.logger.info(f"日志系统初始化完成")
         self.logger.info(f"日志文件: {self.log_file}")
         self.logger.info(f"工作目录: {self.base_dir.absolute()}")
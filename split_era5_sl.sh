@@ -1,6 +1,10 @@
 #!/bin/bash
 # 拆分ERA5地表变量数据文件脚本
 # Split ERA5 surface level data file script
+#
+# 注意：Python工作流已改用内置的xarray/cdo拆分路径，不再调用本脚本。
+# 本脚本仅供手动/独立使用，ERA5_TEMP_DIR、ERA5_YEAR、ERA5_MONTH、
+# ERA5_STEP_OFFSET 等环境变量需要调用方自行设置。
 
 # 设置工作目录为脚本所在目录
 cd "$(dirname "$0")"
@@ -15,7 +19,8 @@ if [ $# -eq 0 ]; then
 fi
 
 INPUT_FILE="$1"
-OUTPUT_DIR="temp"
+# 输出目录可由环境变量指定（Python脚本为tp/sl传入独立目录以便并行拆分）
+OUTPUT_DIR="${ERA5_TEMP_DIR:-temp}"
 
 echo "=== ERA5地表变量数据拆分脚本 ==="
 echo "当前工作目录: $(pwd)"
@@ -88,6 +93,9 @@ esac
 # 计算总时间步数 (每天4个时间点)
 total_timesteps=$((days_in_month * 4))
 
+# 多月归档中该月份的起始时间步偏移（由Python脚本设置，单月文件为0）
+STEP_OFFSET=${ERA5_STEP_OFFSET:-0}
+
 echo "输入文件: $INPUT_FILE (年: $year, 月: $month, 天数: $days_in_month)"
 echo "总时间步数: $total_timesteps"
 
@@ -120,9 +128,9 @@ for i in $(seq 1 $total_timesteps); do
     # 生成输出文件名（保存到pl目录）
     output_file="${OUTPUT_DIR}/era5_${year}${month}${day}_${hour}00.nc"
 
-    # 提取对应时间步
-    echo "处理时间步 $i -> $output_file"
-    if cdo seltimestep,$i $INPUT_FILE $output_file; then
+    # 提取对应时间步（加上多月归档中的偏移）
+    echo "处理时间步 $((i+STEP_OFFSET)) -> $output_file"
+    if cdo seltimestep,$((i+STEP_OFFSET)) $INPUT_FILE $output_file; then
         # 检查文件是否成功创建
         if [ -f "$output_file" ]; then
             file_size=$(stat -c%s "$output_file" 2>/dev/null || stat -f%z "$output_file" 2>/dev/null)